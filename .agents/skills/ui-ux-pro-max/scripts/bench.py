@@ -0,0 +1,568 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Benchmarks - latency of the BM25 search engine
+Usage: python bench.py topk [--domain ux] [--scales 1,10,100] [--queries 200] [-k 3]
+       python bench.py backend [--domain ux] [--scales 1,10,100] [--queries 200] [-k 3]
+       python bench.py design-system [--repeat 20]
+       python bench.py route [--queries 4000] [--log queries.jsonl]
+       python bench.py output [--queries 50] [-k 3]
+       python bench.py suggest [-k 8]
+       python bench.py semantic [--domain ux] [--scales 1,10,100] [--queries 200] [-k 10]
+       python bench.py startup [--runs 15] [--budget-ms 60] [--route-budget-ms 1]    (exits 1 over budget)
+       python bench.py suite [--domains ux,style] [--scales 1,10,100,1000] [-o results.json]
+"""
+
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+import core
+from core import CSV_CONFIG, DATA_DIR, REGISTRY, RESULT_CACHE, BM25, SparseBM25, _load_csv, _numpy, _search_csv, tokenize
+
+
+DESIGN_SYSTEM_QUERIES = [
+    "SaaS dashboard", "e-commerce luxury", "beauty spa wellness service", "fintech crypto app",
+    "bicycle shop e-bike landing page", "kids education platform", "healthcare clinic booking",
+    "portfolio photographer minimal",
+]
+
+
+# search.py invocations timed by `startup`, with modules each one must not import
+STARTUP_CASES = {
+    "search": (["saas dashboard", "--no-daemon"], {"design_system", "socketserver", "tempfile", "sqlite3", "numpy"}),
+    "stack": (["form", "--stack", "react", "--no-daemon"], {"design_system", "socketserver", "tempfile", "sqlite3", "numpy"}),
+    "json": (["saas dashboard", "--json", "--no-daemon"], {"design_system", "socketserver", "sqlite3", "numpy"}),
+    "design-system": (["saas dashboard", "--design-system", "--no-daemon"], {"socketserver", "sqlite3", "numpy"}),
+}
+
+# Timed by `startup` in a fresh interpreter: the first detect_domain() call after import
+COLD_ROUTE_SCRIPT = (
+    "import sys, time; sys.path.insert(0, sys.argv[1]); import core; "
+    "start = time.perf_counter(); core.detect_domain('glassmorphism dark mode dashboard'); "
+    "print((time.perf_counter() - start) * 1000)"
+)
+
+
+# ============ SYNTHETIC CORPORA ============
+def synthetic_rows(domain, scale, seed=0):
+    """(fieldnames, rows) of a domain's CSV with every row replicated `scale` times.
+
+    Copies beyond the first swap about a third of the words in their search
+    columns for words drawn from the whole domain vocabulary, so postings
+    lengths and scores vary the way a larger real corpus would instead of
+    producing exact duplicates. Other columns are copied unchanged.
+    """
+    config = CSV_CONFIG[domain]
+    filepath = DATA_DIR / config["file"]
+    with open(filepath, 'r', encoding='utf-8') as f:
+        fieldnames = csv.DictReader(f).fieldnames
+    base = _load_csv(filepath)
+    vocab = sorted({w for row in base for col in config["search_cols"] for w in str(row.get(col, "")).split()})
+    rng = random.Random(seed)
+
+    rows = list(base)
+    for _ in range(scale - 1):
+        for row in base:
+            copy = dict(row)
+            for col in config["search_cols"]:
+                words = str(row.get(col, "")).split()
+                for i in range(len(words)):
+                    if rng.random() < 0.33:
+                        words[i] = rng.choice(vocab)
+                copy[col] = " ".join(words)
+            rows.append(copy)
+    return fieldnames, rows
+
+
+def synthetic_documents(domain, scale, seed=0):
+    """Search-column documents of synthetic_rows()"""
+    search_cols = CSV_CONFIG[domain]["search_cols"]
+    _, rows = synthetic_rows(domain, scale, seed)
+    return [" ".join(str(row.get(col, "")) for col in search_cols) for row in rows]
+
+
+def sample_queries(documents, count, seed=0):
+    """2-4 word queries sampled from the corpus itself"""
+    rng = random.Random(seed)
+    queries = []
+    while len(queries) < count:
+        words = [w for w in rng.choice(documents).split() if len(w) > 2]
+        if words:
+            queries.append(" ".join(rng.sample(words, min(len(words), rng.randint(2, 4)))))
+    return queries
+
+
+def _percentiles(samples_ms):
+    """p50/p95/p99 of latency samples in ms"""
+    if len(samples_ms) < 2:
+        value = samples_ms[0] if samples_ms else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(samples_ms, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+def _latencies(fn, queries):
+    """Per-call milliseconds of fn(query)"""
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _time_per_query(fn, queries):
+    """Mean milliseconds per call of fn(query)"""
+    start = time.perf_counter()
+    for q in queries:
+        fn(q)
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+# ============ BENCHMARKS ============
+def bench_topk(domain, scales, n_queries, k):
+    """Full sort (score()[:k]) vs. MaxScore top_k() latency as the corpus grows"""
+    print(f"## top-k retrieval: domain={domain}, k={k}, {n_queries} queries")
+    print(f"{'scale':>6} {'docs':>8} {'full sort ms':>13} {'top_k ms':>10} {'speedup':>8}")
+    for scale in scales:
+        documents = synthetic_documents(domain, scale)
+        queries = sample_queries(documents, n_queries)
+        bm25 = BM25()
+        bm25.fit(documents)
+
+        full = _time_per_query(lambda q: bm25.score(q)[:k], queries)
+        topk = _time_per_query(lambda q: bm25.top_k(q, k), queries)
+        print(f"{scale:>6} {len(documents):>8} {full:>13.3f} {topk:>10.3f} {full / topk:>7.1f}x")
+
+
+def bench_backend(domain, scales, n_queries, k):
+    """Pure-Python top_k vs. the NumPy CSR backend, one query at a time and batched"""
+    if _numpy() is None:
+        raise SystemExit("bench.py backend needs NumPy: pip install numpy")
+    print(f"## scoring backend: domain={domain}, k={k}, {n_queries} queries")
+    print(f"{'scale':>6} {'docs':>8} {'python ms':>10} {'numpy ms':>9} {'numpy batch ms':>15}")
+    for scale in scales:
+        documents = synthetic_documents(domain, scale)
+        queries = sample_queries(documents, n_queries)
+        bm25 = BM25()
+        bm25.fit(documents)
+        sparse = SparseBM25(bm25)
+
+        python = _time_per_query(lambda q: bm25.top_k(q, k), queries)
+        numpy = _time_per_query(lambda q: sparse.top_k(q, k), queries)
+        start = time.perf_counter()
+        sparse.score_batch(queries, k)
+        batch = (time.perf_counter() - start) * 1000 / len(queries)
+        print(f"{scale:>6} {len(documents):>8} {python:>10.3f} {numpy:>9.3f} {batch:>15.3f}")
+
+
+def bench_design_system(repeat):
+    """End-to-end generate_design_system latency: cold vs. warm index registry"""
+    from design_system import generate_design_system
+
+    def run(reset):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for q in DESIGN_SYSTEM_QUERIES:
+                reset()
+                generate_design_system(q, None, "ascii")
+        return (time.perf_counter() - start) * 1000 / (repeat * len(DESIGN_SYSTEM_QUERIES))
+
+    def cold():
+        REGISTRY.clear()
+        RESULT_CACHE.clear()
+
+    generate_design_system(DESIGN_SYSTEM_QUERIES[0])  # Make sure segments exist on disk
+    print(f"## design system: {len(DESIGN_SYSTEM_QUERIES)} queries x {repeat}, ms per generate")
+    print(f"{'cold registry (map segments, parse reasoning CSV)':<52} {run(cold):>8.3f}")
+    print(f"{'warm registry, cold result cache':<52} {run(RESULT_CACHE.clear):>8.3f}")
+    print(f"{'warm registry, warm result cache':<52} {run(lambda: None):>8.3f}")
+
+
+def _importtime(args, env):
+    """(wall ms, ms spent importing after interpreter startup, imported module names) for one run"""
+    script = Path(__file__).with_name("search.py")
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", str(script)] + args,
+                          capture_output=True, text=True, env=env, check=True)
+    wall = (time.perf_counter() - start) * 1000
+
+    imported, total, after_site = set(), 0, False
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not after_site:
+            after_site = name.strip() == "site"
+            continue
+        imported.add(name.strip())
+        if not name.startswith("  ") and cumulative.strip().isdigit():
+            total += int(cumulative)
+    return wall, total / 1000, imported
+
+
+def _substring_domain(query):
+    """detect_domain() before the keyword-lookup router: one `in` scan per keyword"""
+    query_lower = query.lower()
+    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in core.DOMAIN_KEYWORDS.items()}
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else core.DEFAULT_DOMAIN
+
+
+def _read_query_log(path):
+    """(query, domain or None) per line: plain text, or --batch style JSON lines"""
+    logged = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("{"):
+                request = json.loads(line)
+                logged.append((request["query"], request.get("domain")))
+            elif line:
+                logged.append((line, None))
+    return logged
+
+
+def bench_route(n_queries, log_path=None):
+    """Substring detect_domain vs. the keyword-lookup router: latency and agreement.
+
+    Without a query log, queries are sampled from each domain's own CSV and
+    labelled with it, so top-1/top-2 hit rates are measurable.
+    """
+    if log_path:
+        logged = _read_query_log(log_path)
+    else:
+        logged = []
+        per_domain = -(-n_queries // len(CSV_CONFIG))
+        for i, domain in enumerate(CSV_CONFIG):
+            logged += [(q, domain) for q in sample_queries(synthetic_documents(domain, 1), per_domain, seed=i)]
+        random.Random(0).shuffle(logged)
+    queries = [q for q, _ in logged]
+
+    old = _percentiles(_latencies(_substring_domain, queries))
+    new = _percentiles(_latencies(core.route, queries))
+    agree = sum(_substring_domain(q) == core.detect_domain(q) for q in queries)
+    print(f"## domain routing: {len(queries)} queries ({log_path or 'sampled from the CSVs'})")
+    print(f"{'router':<18} {'p50 us':>8} {'p99 us':>8}")
+    print(f"{'substring scan':<18} {old['p50'] * 1000:>8.2f} {old['p99'] * 1000:>8.2f}")
+    print(f"{'keyword lookup':<18} {new['p50'] * 1000:>8.2f} {new['p99'] * 1000:>8.2f}")
+    print(f"same top domain: {agree / len(queries):.1%}")
+
+    labelled = [(q, d) for q, d in logged if d]
+    if labelled:
+        old_hits = sum(_substring_domain(q) == d for q, d in labelled)
+        top1 = top2 = 0
+        for q, d in labelled:
+            ranked = [domain for domain, _ in core.route(q)] or [core.DEFAULT_DOMAIN]
+            top1 += ranked[0] == d
+            top2 += d in ranked[:2]
+        n = len(labelled)
+        print(f"labelled hit rate: substring {old_hits / n:.1%}, router top-1 {top1 / n:.1%}, router top-2 {top2 / n:.1%}")
+
+
+def bench_output(n_queries, k):
+    """Bytes and encode time per result set for each search.py output mode"""
+    from compact import _msgpack, encode
+    from search import format_output
+
+    results = []
+    for i, domain in enumerate(CSV_CONFIG):
+        for q in sample_queries(synthetic_documents(domain, 1), n_queries, seed=i):
+            results.append(core.search(q, domain, k))
+            if len(results) % 10 == 0:
+                results.append(core.search_all(q, max_results=k))
+                results.append(core.search_stacks(q, ["react", "nextjs", "html-tailwind"], k))
+
+    modes = [
+        ("text (default)", lambda r: format_output(r).encode('utf-8')),
+        ("--json (indent=2)", lambda r: json.dumps(r, indent=2, ensure_ascii=False).encode('utf-8')),
+        ("--compact json", lambda r: encode(r, "json")),
+        ("--columnar", lambda r: encode(r, "json", True)),
+        ("--compact msgpack", lambda r: encode(r, "msgpack")),
+        ("msgpack --columnar", lambda r: encode(r, "msgpack", True)),
+    ]
+    backend = "msgpack package" if _msgpack() else "stdlib encoder"
+    print(f"## output encodings: {len(results)} result sets, k={k}, MessagePack via {backend}")
+    print(f"{'mode':<20} {'bytes':>8} {'vs --json':>10} {'encode us':>10}")
+    baseline = sum(len(modes[1][1](r)) for r in results)
+    for name, fn in modes:
+        size = sum(len(fn(r)) for r in results)
+        start = time.perf_counter()
+        for r in results:
+            fn(r)
+        elapsed = (time.perf_counter() - start) * 1e6 / len(results)
+        print(f"{name:<20} {size / len(results):>8.0f} {size / baseline:>9.2f}x {elapsed:>10.1f}")
+
+
+def bench_suggest(k):
+    """suggest() latency on a warm index for every keystroke of every name"""
+    prefixes = []
+    for domain in core.SUGGEST_COLS:
+        for name in core._suggest_index(domain).names:
+            prefixes += [(name[:n], domain) for n in range(1, min(len(name), 12) + 1)]
+    print(f"## typeahead: {len(prefixes)} keystroke prefixes, k={k}")
+    print(f"{'scope':<14} {'p50 us':>8} {'p95 us':>8} {'p99 us':>8}")
+    for scope, fn in (("one domain", lambda p: core.suggest(p[0], p[1], k)), ("all domains", lambda p: core.suggest(p[0], None, k))):
+        cuts = _percentiles(_latencies(fn, prefixes))
+        print(f"{scope:<14} {cuts['p50'] * 1000:>8.1f} {cuts['p95'] * 1000:>8.1f} {cuts['p99'] * 1000:>8.1f}")
+
+
+def bench_semantic(domain, scales, n_queries, k):
+    """LSA model build time, and exact vs. IVF nearest-neighbour latency and recall@k"""
+    import semantic
+    from semantic import SemanticIndex
+
+    if _numpy() is None:
+        raise SystemExit("bench.py semantic needs NumPy: pip install numpy")
+    print(f"## semantic ANN: domain={domain}, k={k}, {n_queries} queries, {semantic.IVF_PROBES} probes")
+    print(f"{'scale':>6} {'docs':>8} {'build s':>8} {'exact us':>9} {'ivf us':>8} {'recall':>7}")
+    saved = semantic.EXACT_LIMIT
+    semantic.EXACT_LIMIT = 0  # Force the IVF path for the comparison
+    try:
+        for scale in scales:
+            documents = synthetic_documents(domain, scale)
+            bm25 = BM25()
+            bm25.fit(documents)
+            start = time.perf_counter()
+            index = SemanticIndex.build(bm25, None)
+            build = time.perf_counter() - start
+            vectors = [v for v in (index.embed(bm25, q) for q in sample_queries(documents, n_queries)) if v is not None]
+
+            exact = _time_per_query(lambda v: index.nearest(v, k, exact=True), vectors)
+            ivf = _time_per_query(lambda v: index.nearest(v, k), vectors)
+            hits = sum(len({d for d, _ in index.nearest(v, k, exact=True)} & {d for d, _ in index.nearest(v, k)})
+                       for v in vectors)
+            print(f"{scale:>6} {len(documents):>8} {build:>8.2f} {exact * 1000:>9.1f} {ivf * 1000:>8.1f} "
+                  f"{hits / (k * len(vectors)):>7.3f}")
+    finally:
+        semantic.EXACT_LIMIT = saved
+
+
+def _cold_route_ms(env):
+    """ms of the first detect_domain() in a fresh interpreter, imports excluded"""
+    proc = subprocess.run([sys.executable, "-c", COLD_ROUTE_SCRIPT, str(Path(__file__).parent)],
+                          capture_output=True, text=True, env=env, check=True)
+    return float(proc.stdout)
+
+
+def bench_startup(runs, budget_ms, route_budget_ms):
+    """Cold-start cost of search.py per mode and of the first domain routing;
+    returns False if anything breaks its budget"""
+    env = dict(os.environ)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)  # Measure with bytecode cached, as installed
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    ok = True
+    print(f"## search.py startup: median of {runs} runs, import budget {budget_ms:.0f} ms")
+    print(f"{'mode':<15} {'wall ms':>8} {'imports ms':>11}  status")
+    for mode, (args, forbidden) in STARTUP_CASES.items():
+        _importtime(args, env)  # Warm the bytecode and page caches
+        samples = [_importtime(args, env) for _ in range(runs)]
+        wall = statistics.median(s[0] for s in samples)
+        imports = statistics.median(s[1] for s in samples)
+        leaked = sorted(forbidden & samples[0][2])
+        status = "ok"
+        if imports > budget_ms:
+            status = "OVER BUDGET"
+        if leaked:
+            status = f"imports {', '.join(leaked)}"
+        ok = ok and status == "ok"
+        print(f"{mode:<15} {wall:>8.1f} {imports:>11.1f}  {status}")
+
+    cold = statistics.median(_cold_route_ms(env) for _ in range(runs))
+    status = "ok" if cold <= route_budget_ms else "OVER BUDGET"
+    ok = ok and status == "ok"
+    print(f"first detect_domain: {cold:.3f} ms (budget {route_budget_ms:g} ms)  {status}")
+    return ok
+
+
+def bench_suite_case(domain, scale, n_queries, k, workdir, measure_memory=True):
+    """All suite metrics for one domain at one corpus scale"""
+    config = CSV_CONFIG[domain]
+    fieldnames, rows = synthetic_rows(domain, scale)
+    documents = [" ".join(str(row.get(col, "")) for col in config["search_cols"]) for row in rows]
+    queries = sample_queries(documents, n_queries)
+
+    start = time.perf_counter()
+    n_tokens = sum(len(tokenize(doc)) for doc in documents)
+    tokenize_ms = (time.perf_counter() - start) * 1000
+
+    bm25 = BM25()
+    start = time.perf_counter()
+    bm25.fit(documents)
+    fit_ms = (time.perf_counter() - start) * 1000
+
+    fit_peak_kib = None
+    if measure_memory:
+        tracemalloc.start()
+        BM25().fit(documents)
+        fit_peak_kib = tracemalloc.get_traced_memory()[1] / 1024
+        tracemalloc.stop()
+
+    score = _latencies(bm25.score, queries)
+    top_k = _latencies(lambda q: bm25.top_k(q, k), queries)
+
+    # _search_csv end to end, on a CSV with the real column layout
+    filepath = Path(workdir) / f"{domain}-x{scale}.csv"
+    with open(filepath, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    REGISTRY.clear()
+    start = time.perf_counter()
+    _search_csv(filepath, config["search_cols"], config["output_cols"], queries[0], k)
+    search_cold_ms = (time.perf_counter() - start) * 1000
+    search = _latencies(lambda q: _search_csv(filepath, config["search_cols"], config["output_cols"], q, k), queries)
+    segment = core._index_path(filepath)
+
+    return {
+        "domain": domain,
+        "scale": scale,
+        "docs": len(documents),
+        "tokens": n_tokens,
+        "queries": len(queries),
+        "k": k,
+        "tokenize_ms": tokenize_ms,
+        "fit_ms": fit_ms,
+        "fit_peak_kib": fit_peak_kib,
+        "score_ms": _percentiles(score),
+        "top_k_ms": _percentiles(top_k),
+        "search_csv_cold_ms": search_cold_ms,
+        "search_csv_ms": _percentiles(search),
+        "search_csv_qps": len(search) * 1000 / sum(search),
+        "segment_bytes": segment.stat().st_size if segment.exists() else None,
+    }
+
+
+def bench_suite(domains, scales, n_queries, k, measure_memory=True):
+    """Run every (domain, scale) case; returns a JSON-serializable report"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        commit = None
+    report = {
+        "meta": {
+            "commit": commit,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": core.SCORING_BACKEND,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": [],
+    }
+
+    # Synthetic CSVs and their segments live in a scratch dir; the result cache
+    # is disabled so repeated queries measure search, not cache hits
+    saved = core.INDEX_DIR, RESULT_CACHE.maxsize, core.QUERY_CACHE
+    RESULT_CACHE.maxsize, core.QUERY_CACHE = 0, None
+    try:
+        with tempfile.TemporaryDirectory(prefix="uipro-bench-") as workdir:
+            core.INDEX_DIR = Path(workdir) / "index"
+            print(f"{'domain':<11} {'scale':>5} {'docs':>8} {'fit ms':>9} {'peak KiB':>9} "
+                  f"{'top_k p50/p99 ms':>17} {'search p50/p99 ms':>18} {'qps':>8}", file=sys.stderr)
+            for domain in domains:
+                for scale in scales:
+                    r = bench_suite_case(domain, scale, n_queries, k, workdir, measure_memory)
+                    report["results"].append(r)
+                    peak = f"{r['fit_peak_kib']:.0f}" if r["fit_peak_kib"] is not None else "-"
+                    print(f"{domain:<11} {scale:>5} {r['docs']:>8} {r['fit_ms']:>9.1f} {peak:>9} "
+                          f"{r['top_k_ms']['p50']:>8.3f}/{r['top_k_ms']['p99']:<8.3f} "
+                          f"{r['search_csv_ms']['p50']:>8.3f}/{r['search_csv_ms']['p99']:<9.3f} "
+                          f"{r['search_csv_qps']:>8.0f}", file=sys.stderr)
+    finally:
+        core.INDEX_DIR, RESULT_CACHE.maxsize, core.QUERY_CACHE = saved
+        REGISTRY.clear()
+
+    try:
+        import resource
+        report["meta"]["max_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except ImportError:
+        pass
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UI Pro Max Benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    topk = sub.add_parser("topk", help="Full sort vs. top-k with MaxScore pruning")
+    topk.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), default="ux")
+    topk.add_argument("--scales", default="1,10,100", help="Corpus multipliers (default: 1,10,100)")
+    topk.add_argument("--queries", type=int, default=200, help="Queries per scale (default: 200)")
+    topk.add_argument("-k", type=int, default=3, help="Results kept per query (default: 3)")
+
+    backend = sub.add_parser("backend", help="Pure-Python vs. NumPy sparse scoring")
+    backend.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), default="ux")
+    backend.add_argument("--scales", default="1,10,100", help="Corpus multipliers (default: 1,10,100)")
+    backend.add_argument("--queries", type=int, default=200, help="Queries per scale (default: 200)")
+    backend.add_argument("-k", type=int, default=3, help="Results kept per query (default: 3)")
+
+    design = sub.add_parser("design-system", help="End-to-end --design-system latency")
+    design.add_argument("--repeat", type=int, default=20, help="Passes over the query set (default: 20)")
+
+    route = sub.add_parser("route", help="Substring vs. keyword-lookup domain routing")
+    route.add_argument("--queries", type=int, default=4000, help="Sampled queries when no log is given (default: 4000)")
+    route.add_argument("--log", help="Query log: one query per line, or --batch JSON lines")
+
+    output = sub.add_parser("output", help="Bytes and encode time of text, JSON, compact JSON, columnar and MessagePack output")
+    output.add_argument("--queries", type=int, default=50, help="Sampled queries per domain (default: 50)")
+    output.add_argument("-k", type=int, default=3, help="Results per query (default: 3)")
+
+    suggest = sub.add_parser("suggest", help="Typeahead latency per keystroke on a warm index")
+    suggest.add_argument("-k", type=int, default=8, help="Suggestions per prefix (default: 8)")
+
+    sem = sub.add_parser("semantic", help="LSA build time and exact vs. IVF nearest-neighbour search (needs NumPy)")
+    sem.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), default="ux")
+    sem.add_argument("--scales", default="1,10,100", help="Corpus multipliers (default: 1,10,100)")
+    sem.add_argument("--queries", type=int, default=200, help="Queries per scale (default: 200)")
+    sem.add_argument("-k", type=int, default=10, help="Neighbours per query (default: 10)")
+
+    startup = sub.add_parser("startup", help="search.py cold-start time per mode, failing over budget")
+    startup.add_argument("--runs", type=int, default=15, help="Runs per mode (default: 15)")
+    startup.add_argument("--budget-ms", type=float, default=60.0, help="Max median import time per mode (default: 60)")
+    startup.add_argument("--route-budget-ms", type=float, default=1.0, help="Max median first detect_domain() time (default: 1)")
+
+    suite = sub.add_parser("suite", help="Build/query/memory metrics over synthetically scaled corpora (JSON)")
+    suite.add_argument("--domains", default=",".join(CSV_CONFIG), help="Comma-separated domains (default: all)")
+    suite.add_argument("--scales", default="1,10,100,1000", help="Corpus multipliers (default: 1,10,100,1000)")
+    suite.add_argument("--queries", type=int, default=200, help="Queries per case (default: 200)")
+    suite.add_argument("-k", type=int, default=3, help="Results kept per query (default: 3)")
+    suite.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass (faster)")
+    suite.add_argument("--output", "-o", help="Write the JSON report here instead of stdout")
+
+    args = parser.parse_args()
+
+    if args.bench == "topk":
+        bench_topk(args.domain, [int(s) for s in args.scales.split(",")], args.queries, args.k)
+    elif args.bench == "backend":
+        bench_backend(args.domain, [int(s) for s in args.scales.split(",")], args.queries, args.k)
+    elif args.bench == "design-system":
+        bench_design_system(args.repeat)
+    elif args.bench == "route":
+        bench_route(args.queries, args.log)
+    elif args.bench == "output":
+        bench_output(args.queries, args.k)
+    elif args.bench == "suggest":
+        bench_suggest(args.k)
+    elif args.bench == "semantic":
+        bench_semantic(args.domain, [int(s) for s in args.scales.split(",")], args.queries, args.k)
+    elif args.bench == "startup":
+        sys.exit(0 if bench_startup(args.runs, args.budget_ms, args.route_budget_ms) else 1)
+    elif args.bench == "suite":
+        report = bench_suite(args.domains.split(","), [int(s) for s in args.scales.split(",")],
+                             args.queries, args.k, not args.no_memory)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        else:
+            print(json.dumps(report, indent=2))
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Compact Output - machine encodings of search results
+
+Usage:
+    from compact import encode
+    data = encode(result, "json")                   # minified JSON
+    data = encode(result, "msgpack", columnar=True)  # MessagePack of the columnar layout
+
+MessagePack uses the msgpack package when installed and the stdlib encoder
+below otherwise; both produce the same bytes for search results.
+"""
+
+import json
+import struct
+
+
+# ============ CONFIGURATION ============
+ENCODINGS = ("json", "msgpack")
+
+
+# ============ COLUMNAR LAYOUT ============
+def to_columnar(result):
+    """Result with column names listed once and every row as an array.
+
+    Global (--domain all) hits are flattened to domain, file and score
+    followed by the row's own columns; multi-stack reports are converted
+    stack by stack. Missing cells are null.
+    """
+    if "error" in result or "results" not in result:
+        return result
+    if result.get("domain") == "stacks":
+        return dict(result, results=[to_columnar(report) for report in result["results"]])
+
+    rows = result["results"]
+    if result.get("domain") == "all":
+        rows = [dict({"domain": hit["domain"], "file": hit["file"], "score": hit["score"]}, **hit["row"])
+                for hit in rows]
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    table = {key: value for key, value in result.items() if key != "results"}
+    table["columns"] = columns
+    table["rows"] = [[row.get(col) for col in columns] for row in rows]
+    return table
+
+
+# ============ MESSAGEPACK ============
+def _msgpack():
+    """msgpack module if installed, else None (the stdlib encoder is used)"""
+    try:
+        import msgpack
+    except ImportError:
+        return None
+    return msgpack
+
+
+def _pack(obj, out):
+    # Most frequent types first: search results are mostly strings in dicts
+    if isinstance(obj, str):
+        data = obj.encode('utf-8')
+        size = len(data)
+        if size < 32:
+            out.append(0xa0 | size)
+        else:
+            _header(out, size, None, 0, (0xd9, 0xda, 0xdb))
+        out += data
+    elif isinstance(obj, dict):
+        _header(out, len(obj), 0x80, 16, (None, 0xde, 0xdf))
+        for key, value in obj.items():
+            _pack(key, out)
+            _pack(value, out)
+    elif isinstance(obj, (list, tuple)):
+        _header(out, len(obj), 0x90, 16, (None, 0xdc, 0xdd))
+        for item in obj:
+            _pack(item, out)
+    elif obj is None:
+        out.append(0xc0)
+    elif obj is True:
+        out.append(0xc3)
+    elif obj is False:
+        out.append(0xc2)
+    elif isinstance(obj, int):
+        if 0 <= obj < 0x80:
+            out.append(obj)
+        elif -32 <= obj < 0:
+            out.append(obj & 0xff)
+        elif obj >= 0:
+            for limit, code, fmt in ((0xff, 0xcc, ">B"), (0xffff, 0xcd, ">H"), (0xffffffff, 0xce, ">I"), (0xffffffffffffffff, 0xcf, ">Q")):
+                if obj <= limit:
+                    out.append(code)
+                    out += struct.pack(fmt, obj)
+                    break
+            else:
+                raise OverflowError(f"Integer too large for MessagePack: {obj}")
+        else:
+            for limit, code, fmt in ((-0x80, 0xd0, ">b"), (-0x8000, 0xd1, ">h"), (-0x80000000, 0xd2, ">i"), (-0x8000000000000000, 0xd3, ">q")):
+                if obj >= limit:
+                    out.append(code)
+                    out += struct.pack(fmt, obj)
+                    break
+            else:
+                raise OverflowError(f"Integer too large for MessagePack: {obj}")
+    elif isinstance(obj, float):
+        out.append(0xcb)
+        out += struct.pack(">d", obj)
+    elif isinstance(obj, (bytes, bytearray, memoryview)):
+        data = bytes(obj)
+        _header(out, len(data), None, 0, (0xc4, 0xc5, 0xc6))
+        out += data
+    else:
+        raise TypeError(f"Cannot serialize {type(obj).__name__} to MessagePack")
+
+
+def _header(out, size, fix, fix_limit, codes):
+    """Length prefix: fix-size form when possible, else the 8/16/32-bit form"""
+    if fix is not None and size < fix_limit:
+        out.append(fix | size)
+    elif codes[0] is not None and size <= 0xff:
+        out += bytes((codes[0], size))
+    elif size <= 0xffff:
+        out.append(codes[1])
+        out += struct.pack(">H", size)
+    else:
+        out.append(codes[2])
+        out += struct.pack(">I", size)
+
+
+def packb(obj):
+    """MessagePack bytes for JSON-like data (None, bool, int, float, str, bytes, list, dict)"""
+    msgpack = _msgpack()
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    out = bytearray()
+    _pack(obj, out)
+    return bytes(out)
+
+
+def unpackb(data):
+    """Inverse of packb() for the types it writes"""
+    msgpack = _msgpack()
+    if msgpack is not None:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+    obj, end = _unpack(memoryview(data), 0)
+    if end != len(data):
+        raise ValueError(f"Trailing data after MessagePack object at byte {end}")
+    return obj
+
+
+_FIXED = {0xcc: ">B", 0xcd: ">H", 0xce: ">I", 0xcf: ">Q", 0xd0: ">b", 0xd1: ">h", 0xd2: ">i", 0xd3: ">q", 0xca: ">f", 0xcb: ">d"}
+_SIZED = {0xd9: (">B", "str"), 0xda: (">H", "str"), 0xdb: (">I", "str"), 0xc4: (">B", "bin"), 0xc5: (">H", "bin"),
+          0xc6: (">I", "bin"), 0xdc: (">H", "array"), 0xdd: (">I", "array"), 0xde: (">H", "map"), 0xdf: (">I", "map")}
+
+
+def _unpack(data, pos):
+    code = data[pos]
+    pos += 1
+    if code < 0x80:
+        return code, pos
+    if code >= 0xe0:
+        return code - 0x100, pos
+    if code == 0xc0:
+        return None, pos
+    if code in (0xc2, 0xc3):
+        return code == 0xc3, pos
+    if code in _FIXED:
+        fmt = _FIXED[code]
+        return struct.unpack_from(fmt, data, pos)[0], pos + struct.calcsize(fmt)
+    if 0xa0 <= code <= 0xbf:
+        kind, size = "str", code & 0x1f
+    elif 0x90 <= code <= 0x9f:
+        kind, size = "array", code & 0x0f
+    elif 0x80 <= code <= 0x8f:
+        kind, size = "map", code & 0x0f
+    elif code in _SIZED:
+        fmt, kind = _SIZED[code]
+        size = struct.unpack_from(fmt, data, pos)[0]
+        pos += struct.calcsize(fmt)
+    else:
+        raise ValueError(f"Unsupported MessagePack type 0x{code:02x}")
+
+    if kind == "str":
+        return str(data[pos:pos + size], 'utf-8'), pos + size
+    if kind == "bin":
+        return bytes(data[pos:pos + size]), pos + size
+    if kind == "array":
+        items = []
+        for _ in range(size):
+            item, pos = _unpack(data, pos)
+            items.append(item)
+        return items, pos
+    mapping = {}
+    for _ in range(size):
+        key, pos = _unpack(data, pos)
+        mapping[key], pos = _unpack(data, pos)
+    return mapping, pos
+
+
+# ============ ENCODE ============
+def encode(result, encoding="json", columnar=False):
+    """Bytes of a search result: minified JSON (UTF-8) or MessagePack, optionally columnar"""
+    if columnar:
+        result = to_columnar(result)
+    if encoding == "msgpack":
+        return packb(result)
+    if encoding == "json":
+        return json.dumps(result, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    raise ValueError(f"Unknown encoding: {encoding}. Available: {', '.join(ENCODINGS)}")
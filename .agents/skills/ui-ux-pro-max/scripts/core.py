@@ -5,14 +5,33 @@ UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
 import csv
-import re
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
 from pathlib import Path
 from math import log
-from collections import defaultdict
+from bisect import bisect_left
+from collections import Counter, OrderedDict, defaultdict
+from heapq import heappush, heapreplace, nsmallest
+from time import perf_counter
 
 # ============ CONFIGURATION ============
 DATA_DIR = Path(__file__).parent.parent / "data"
+INDEX_DIR = Path(os.environ.get("UIPRO_INDEX_DIR", DATA_DIR / ".index"))
+INDEX_VERSION = 5
 MAX_RESULTS = 3
+RESULT_CACHE_SIZE = int(os.environ.get("UIPRO_RESULT_CACHE_SIZE", 256))
+# "1" for the default location under INDEX_DIR, or a path to a SQLite file
+QUERY_CACHE_ENV = "UIPRO_QUERY_CACHE"
+# "numpy" scores through SparseBM25 when NumPy is installed; "python" needs only the stdlib
+SCORING_BACKENDS = ("python", "numpy")
+SCORING_BACKEND = "python"   # UIPRO_BACKEND is applied through set_backend() at import
+STACK_WORKERS = 8   # threads for search_stacks()
 
 CSV_CONFIG = {
     "style": {
@@ -94,68 +113,1192 @@ _STACK_COLS = {
 
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
+# Name-like column per domain, completed by suggest()
+SUGGEST_COLS = {
+    "style": "Style Category",
+    "color": "Product Type",
+    "typography": "Font Pairing Name",
+    "icons": "Icon Name",
+    "product": "Product Type",
+    "landing": "Pattern Name"
+}
+SUGGEST_RESULTS = 8
+
+
+# ============ PROFILING ============
+class _Stage:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, perf_counter() - self.start)
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NO_STAGE = _NoStage()
+
+
+class Profiler:
+    """Wall time per named stage (csv_load, tokenize, fit, score, ...), collected only while enabled.
+
+    Stages may nest - a design_system.<domain> stage contains that domain's
+    score and hydrate stages - so their times overlap rather than sum to the
+    total. While disabled, stage() is a shared no-op context manager.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._times = {}     # name -> (seconds, calls)
+        self._start = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Clear previous timings and start collecting"""
+        with self._lock:
+            self._times.clear()
+            self._start = perf_counter()
+            self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def stage(self, name):
+        """Context manager timing one run of a stage"""
+        return _Stage(self, name) if self.enabled else _NO_STAGE
+
+    def add(self, name, seconds):
+        with self._lock:
+            total, calls = self._times.get(name, (0.0, 0))
+            self._times[name] = (total + seconds, calls + 1)
+
+    def report(self):
+        """{"total_ms": ..., "stages": {name: {"ms": ..., "calls": ...}}} since start()"""
+        with self._lock:
+            stages = {name: {"ms": round(total * 1000, 3), "calls": calls}
+                      for name, (total, calls) in self._times.items()}
+        total = perf_counter() - self._start if self._start is not None else 0.0
+        return {"total_ms": round(total * 1000, 3), "stages": stages}
+
+
+PROFILER = Profiler()
+
 
 # ============ BM25 IMPLEMENTATION ============
+# Slack for floating-point rounding when comparing upper bounds to the heap threshold
+_PRUNE_EPS = 1e-9
+# Below this many candidate postings, exhaustive scoring beats MaxScore's bookkeeping
+_EXHAUSTIVE_POSTINGS = 256
+
+
+class _TokenTable(dict):
+    r"""str.translate table: word and whitespace characters map to themselves, all others to a space.
+
+    The same classes as re's \w (isalnum() or "_") and \s (isspace()), so
+    translating is equivalent to re.sub(r'[^\w\s]', ' ', text). Latin code
+    points are filled in up front; any other character is classified on first
+    sight and remembered.
+    """
+
+    def __missing__(self, code):
+        ch = chr(code)
+        value = code if ch.isalnum() or ch == "_" or ch.isspace() else 32
+        self[code] = value
+        return value
+
+
+_TOKEN_TABLE = _TokenTable()
+for _code in range(0x250):
+    _TOKEN_TABLE[_code]
+del _code
+
+
+def tokenize(text):
+    """Lowercase, split, remove punctuation, filter short words"""
+    return [w for w in str(text).lower().translate(_TOKEN_TABLE).split() if len(w) > 2]
+
+
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """BM25 ranking algorithm for text search, backed by an inverted index.
+
+    Terms are interned to integer ids at fit time (vocab); postings, idf,
+    max_impact and doc_freqs are indexed by term id, and queries are scored
+    as arrays of term ids.
+    """
 
     def __init__(self, k1=1.5, b=0.75):
         self.k1 = k1
         self.b = b
-        self.corpus = []
-        self.doc_lengths = []
+        self.vocab = {}               # term -> term id
+        self.postings = []            # term id -> (doc_ids, tfs)
+        self.doc_lengths = array('I')
+        self.norms = []
         self.avgdl = 0
-        self.idf = {}
-        self.doc_freqs = defaultdict(int)
+        self.idf = array('d')
+        self.max_impact = array('d')
+        self.doc_freqs = array('I')
         self.N = 0
 
     def tokenize(self, text):
         """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
+        return tokenize(text)
 
     def fit(self, documents):
-        """Build BM25 index from documents"""
-        self.corpus = [self.tokenize(doc) for doc in documents]
-        self.N = len(self.corpus)
+        """Build inverted index (term id -> (doc_ids, tfs)) and length norms"""
+        with PROFILER.stage("tokenize"):
+            tokenized = [self.tokenize(doc) for doc in documents]
+        with PROFILER.stage("fit"):
+            self._fit(tokenized)
+
+    def _fit(self, tokenized):
+        vocab = self.vocab = {}
+        postings = self.postings = []
+        doc_lengths = self.doc_lengths = array('I')
+        for doc_id, tokens in enumerate(tokenized):
+            doc_lengths.append(len(tokens))
+            for word, tf in Counter(tokens).items():
+                term_id = vocab.get(word)
+                if term_id is None:
+                    term_id = vocab[word] = len(postings)
+                    postings.append((array('I'), array('I')))
+                doc_ids, tfs = postings[term_id]
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+        self._finish()
+
+    def _finish(self):
+        """Corpus statistics and per-term weights from postings and doc_lengths"""
+        self.N = len(self.doc_lengths)
         if self.N == 0:
             return
-        self.doc_lengths = [len(doc) for doc in self.corpus]
         self.avgdl = sum(self.doc_lengths) / self.N
 
-        for doc in self.corpus:
-            seen = set()
-            for word in doc:
-                if word not in seen:
-                    self.doc_freqs[word] += 1
-                    seen.add(word)
+        # Denominator term k1 * (1 - b + b * dl / avgdl) is fixed per document
+        self.norms = [self.k1 * (1 - self.b + self.b * dl / self.avgdl) for dl in self.doc_lengths]
 
-        for word, freq in self.doc_freqs.items():
-            self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
+        self.doc_freqs = array('I', [len(doc_ids) for doc_ids, _ in self.postings])
+        self.idf, self.max_impact = array('d'), array('d')
+        for doc_ids, tfs in self.postings:
+            idf, max_impact = self._term_weights(doc_ids, tfs)
+            self.idf.append(idf)
+            self.max_impact.append(max_impact)
+
+    def _term_weights(self, doc_ids, tfs):
+        """(idf, max impact) of a term; max impact bounds its contribution to any document, for top_k pruning"""
+        k1_plus = self.k1 + 1
+        norms = self.norms
+        idf = log((self.N - len(doc_ids) + 0.5) / (len(doc_ids) + 0.5) + 1)
+        return idf, max(idf * (tf * k1_plus) / (tf + norms[d]) for d, tf in zip(doc_ids, tfs))
+
+    def _term_id(self, token):
+        """Term id of a token; -1 if unindexed"""
+        return self.vocab.get(token, -1)
+
+    def query_vector(self, query):
+        """Term ids of the query's indexed tokens, in query order (repeats kept)"""
+        ids = array('i')
+        for token in self.tokenize(query):
+            term_id = self._term_id(token)
+            if term_id >= 0:
+                ids.append(term_id)
+        return ids
+
+    def _lookup(self, term_id):
+        """Return (idf, max_impact, doc_ids, tfs) for a term id"""
+        doc_ids, tfs = self.postings[term_id]
+        return self.idf[term_id], self.max_impact[term_id], doc_ids, tfs
+
+    def _accumulate(self, term_ids):
+        """doc_id -> score over every posting of the query's term ids"""
+        scores = defaultdict(float)
+        k1_plus = self.k1 + 1
+        norms = self.norms
+
+        for term_id in term_ids:
+            idf, _, doc_ids, tfs = self._lookup(term_id)
+            for doc_id, tf in zip(doc_ids, tfs):
+                scores[doc_id] += idf * (tf * k1_plus) / (tf + norms[doc_id])
+        return scores
 
     def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
+        """Score documents matching any query term, best first"""
+        scores = self._accumulate(self.query_vector(query))
+        # Ties keep document order, as with a stable descending sort
+        return sorted(scores.items(), key=lambda x: (-x[1], x[0]))
+
+    def top_k(self, query, k):
+        """Best k documents, same order as score()[:k], using MaxScore pruning.
+
+        Query terms are ordered by their max impact. Once the heap holds k
+        documents, the low-impact terms whose combined upper bound cannot
+        beat the k-th score become non-essential: candidates come only from
+        the essential postings, and non-essential postings are probed (by
+        binary search) only while the document can still enter the heap.
+        """
+        if k <= 0:
+            return []
+        term_ids = self.query_vector(query)
+        k1_plus = self.k1 + 1
+        norms = self.norms
+
+        terms = []
+        for term_id in dict.fromkeys(term_ids):
+            idf, max_impact, doc_ids, tfs = self._lookup(term_id)
+            count = term_ids.count(term_id)
+            terms.append((count * max_impact, count, idf, doc_ids, tfs, term_id))
+        if not terms:
+            return []
+        if sum(len(t[3]) for t in terms) <= _EXHAUSTIVE_POSTINGS:
+            scores = self._accumulate(term_ids)
+            return nsmallest(k, scores.items(), key=lambda x: (-x[1], x[0]))
+        terms.sort(key=lambda t: t[0])
+
+        # bound_below[i]: best possible total from terms[0:i]
+        bound_below = [0.0]
+        for t in terms:
+            bound_below.append(bound_below[-1] + t[0])
+
+        n_terms = len(terms)
+        cursors = [0] * n_terms
+        # Doc id under each essential cursor, self.N once exhausted
+        heads = [t[3][0] for t in terms]
+        first_essential = 0
+        heap = []  # (score, -doc_id), smallest first
+        threshold = 0.0
+
+        while first_essential < n_terms:
+            doc_id = min(heads[first_essential:])
+            if doc_id == self.N:
+                break
+
+            contrib = {}
+            partial = 0.0
+            for i in range(first_essential, n_terms):
+                if heads[i] == doc_id:
+                    _, count, idf, doc_ids, tfs, term_id = terms[i]
+                    pos = cursors[i]
+                    tf = tfs[pos]
+                    w = idf * (tf * k1_plus) / (tf + norms[doc_id])
+                    contrib[term_id] = w
+                    partial += count * w
+                    pos += 1
+                    cursors[i] = pos
+                    heads[i] = doc_ids[pos] if pos < len(doc_ids) else self.N
+
+            pruned = False
+            for i in range(first_essential - 1, -1, -1):
+                if len(heap) == k and partial + bound_below[i + 1] <= threshold - _PRUNE_EPS:
+                    pruned = True
+                    break
+                _, count, idf, doc_ids, tfs, term_id = terms[i]
+                pos = bisect_left(doc_ids, doc_id, cursors[i])
+                cursors[i] = pos
+                if pos < len(doc_ids) and doc_ids[pos] == doc_id:
+                    tf = tfs[pos]
+                    w = idf * (tf * k1_plus) / (tf + norms[doc_id])
+                    contrib[term_id] = w
+                    partial += count * w
+            if pruned:
+                continue
+
+            # Re-add in query order so scores match score() bit for bit
+            total = 0.0
+            for term_id in term_ids:
+                if term_id in contrib:
+                    total += contrib[term_id]
+
+            if len(heap) < k:
+                heappush(heap, (total, -doc_id))
+            elif total > threshold:
+                heapreplace(heap, (total, -doc_id))
+            else:
+                continue
+            if len(heap) == k:
+                threshold = heap[0][0]
+                while first_essential < n_terms and bound_below[first_essential + 1] <= threshold - _PRUNE_EPS:
+                    first_essential += 1
+
+        return [(-neg_id, total) for total, neg_id in sorted(heap, key=lambda x: (-x[0], -x[1]))]
+
+    def iter_postings(self):
+        """(term, doc_ids, tfs) for every indexed term"""
+        for term, term_id in self.vocab.items():
+            doc_ids, tfs = self.postings[term_id]
+            yield term, doc_ids, tfs
+
+    def export_postings(self):
+        """Flat postings: (term_starts, idf, doc_ids, tfs), term id i at [starts[i], starts[i+1])"""
+        starts, doc_ids, tfs = array('Q', [0]), array('I'), array('I')
+        for ids, freqs in self.postings:
+            doc_ids.extend(ids)
+            tfs.extend(freqs)
+            starts.append(len(doc_ids))
+        return starts, self.idf, doc_ids, tfs
+
+
+# ============ CSV ROWS ============
+def _csv_lines(data):
+    """Decoded lines of CSV bytes with newlines translated as by open() in text mode"""
+    for line in data.splitlines(keepends=True):
+        text = line.decode('utf-8')
+        yield text.rstrip('\r\n') + '\n' if text[-1] in '\r\n' else text
+
+
+def _scan_csv(filepath):
+    """Parse a CSV exactly like _load_csv, also recording where each row lies in the file.
+
+    Returns (fieldnames, rows, offsets); row i occupies bytes
+    [offsets[i], offsets[i + 1]).
+    """
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    pos = 0
+
+    def lines():
+        # csv never reads ahead, so pos is the end of the last line of the last row read
+        nonlocal pos
+        for line in data.splitlines(keepends=True):
+            pos += len(line)
+            yield from _csv_lines(line)
+
+    reader = csv.DictReader(lines())
+    fieldnames = reader.fieldnames or []
+    rows, offsets = [], array('Q', [pos])
+    for row in reader:
+        rows.append(row)
+        offsets.append(pos)
+    return fieldnames, rows, offsets
+
+
+class _CSVRows:
+    """Output columns of a CSV's rows, parsed from the file on access.
+
+    Only the byte span of each row is held in memory; a search hydrates just
+    the rows it returns. Where os.pread exists the file stays open for reads;
+    elsewhere (Windows) it is reopened per row so it can still be replaced.
+    """
+
+    def __init__(self, filepath, fieldnames, offsets, output_cols):
+        self.filepath = filepath
+        self.fieldnames = list(fieldnames)
+        self.offsets = offsets
+        self._output_cols = output_cols
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def __del__(self):
+        if self._fd is not None:
+            os.close(self._fd)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _read(self, start, end):
+        if not hasattr(os, "pread"):
+            with open(self.filepath, 'rb') as f:
+                f.seek(start)
+                return f.read(end - start)
+        if self._fd is None:
+            with self._lock:
+                if self._fd is None:
+                    self._fd = os.open(self.filepath, os.O_RDONLY)
+        return os.pread(self._fd, end - start, start)
+
+    def __getitem__(self, idx):
+        data = self._read(self.offsets[idx], self.offsets[idx + 1])
+        row = next(csv.DictReader(_csv_lines(data), fieldnames=self.fieldnames))
+        return {col: row.get(col, "") for col in self._output_cols if col in row}
+
+
+# ============ SEGMENT FILE FORMAT ============
+# Little-endian header, then a table of (offset, length) per section. Sections
+# are 8-byte aligned; numeric sections are native-endian arrays read in place.
+SEGMENT_MAGIC = b"UIPXSEG\x00"
+_SEGMENT_HEADER = struct.Struct("<8sIIIIddd")  # magic, version, docs, terms, sections, avgdl, k1, b
+_SECTION_ENTRY = struct.Struct("<QQ")
+_SEGMENT_SECTIONS = (
+    ("key", None),            # JSON cache key (version, digest, columns, byte order)
+    ("terms", None),          # UTF-8 terms, sorted by bytes, concatenated
+    ("term_offsets", "Q"),    # byte offset of term i in "terms" (len terms + 1)
+    ("term_starts", "Q"),     # first posting of term i (len terms + 1)
+    ("idf", "d"),
+    ("max_impact", "d"),
+    ("doc_ids", "I"),         # postings, grouped by term
+    ("tfs", "I"),
+    ("doc_lengths", "I"),
+    ("norms", "d"),
+    ("fieldnames", None),     # JSON header of the CSV
+    ("row_offsets", "Q"),     # byte span of each CSV row, see _scan_csv (whole file, even for deltas)
+    ("row_hashes", "Q"),      # _row_hash() of each row, to detect edits incrementally
+    ("sources", "q"),         # delta segments only: see BM25Delta
+)
+
+
+def write_segment(path, bm25, rows, key, row_hashes=(), sources=()):
+    """Serialize a fitted BM25 and where its rows lie in the CSV (a _CSVRows, or None) to a segment file"""
+    # Segment term ids are positions in byte order, so lookups can binary search
+    terms = sorted(bm25.vocab, key=lambda t: t.encode('utf-8'))
+    term_blob = bytearray()
+    term_offsets, term_starts = array('Q', [0]), array('Q', [0])
+    idf, max_impact, doc_ids, tfs = array('d'), array('d'), array('I'), array('I')
+    for term in terms:
+        term_blob += term.encode('utf-8')
+        term_offsets.append(len(term_blob))
+        term_id = bm25.vocab[term]
+        ids, freqs = bm25.postings[term_id]
+        doc_ids.extend(ids)
+        tfs.extend(freqs)
+        term_starts.append(len(doc_ids))
+        idf.append(bm25.idf[term_id])
+        max_impact.append(bm25.max_impact[term_id])
+
+    payloads = {
+        "key": json.dumps(key).encode('utf-8'),
+        "terms": bytes(term_blob),
+        "term_offsets": term_offsets.tobytes(),
+        "term_starts": term_starts.tobytes(),
+        "idf": idf.tobytes(),
+        "max_impact": max_impact.tobytes(),
+        "doc_ids": doc_ids.tobytes(),
+        "tfs": tfs.tobytes(),
+        "doc_lengths": array('I', bm25.doc_lengths).tobytes(),
+        "norms": array('d', bm25.norms).tobytes(),
+        "fieldnames": json.dumps(rows.fieldnames if rows else []).encode('utf-8'),
+        "row_offsets": array('Q', rows.offsets if rows else [0]).tobytes(),
+        "row_hashes": array('Q', row_hashes).tobytes(),
+        "sources": array('q', sources).tobytes(),
+    }
+
+    header = _SEGMENT_HEADER.pack(SEGMENT_MAGIC, INDEX_VERSION, bm25.N, len(terms),
+                                  len(_SEGMENT_SECTIONS), bm25.avgdl, bm25.k1, bm25.b)
+    table, body = bytearray(), bytearray()
+    start = len(header) + _SECTION_ENTRY.size * len(_SEGMENT_SECTIONS)
+    for name, _ in _SEGMENT_SECTIONS:
+        body += b"\0" * (-(start + len(body)) % 8)
+        table += _SECTION_ENTRY.pack(start + len(body), len(payloads[name]))
+        body += payloads[name]
+
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(header + table + body)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+class BM25Segment(BM25):
+    """Read-only BM25 queried in place from a memory-mapped segment file.
+
+    Nothing is unpickled or copied at load time: postings, idf and norms are
+    memoryviews over the mapping, so processes reading the same segment share
+    one page-cached copy.
+    """
+
+    def __init__(self, path):
+        super().__init__()
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._mmap)
+        magic, version, n_docs, n_terms, n_sections, avgdl, k1, b = _SEGMENT_HEADER.unpack_from(view)
+        if magic != SEGMENT_MAGIC or version != INDEX_VERSION or n_sections != len(_SEGMENT_SECTIONS):
+            raise ValueError(f"Not a current index segment: {path}")
+
+        sections = {}
+        pos = _SEGMENT_HEADER.size
+        for name, typecode in _SEGMENT_SECTIONS:
+            offset, length = _SECTION_ENTRY.unpack_from(view, pos)
+            pos += _SECTION_ENTRY.size
+            part = view[offset:offset + length]
+            sections[name] = part.cast(typecode) if typecode else part
+
+        self.N, self.avgdl, self.k1, self.b = n_docs, avgdl, k1, b
+        self.n_terms = n_terms
+        self.key = json.loads(sections["key"].tobytes())
+        self._terms = sections["terms"]
+        self._term_offsets = sections["term_offsets"]
+        self._term_starts = sections["term_starts"]
+        self._idf = sections["idf"]
+        self._max_impact = sections["max_impact"]
+        self._doc_ids = sections["doc_ids"]
+        self._tfs = sections["tfs"]
+        self.doc_lengths = sections["doc_lengths"]
+        self.norms = sections["norms"]
+        self.fieldnames = json.loads(sections["fieldnames"].tobytes())
+        self.row_offsets = sections["row_offsets"]
+        self.row_hashes = sections["row_hashes"]
+        self.sources = sections["sources"]
+
+    def fit(self, documents):
+        raise TypeError("BM25Segment is read-only; fit a BM25 and write_segment() it")
+
+    def csv_rows(self, filepath, output_cols):
+        """The indexed CSV's rows, located through this segment"""
+        return _CSVRows(filepath, self.fieldnames, self.row_offsets, output_cols)
+
+    def _term_id(self, token):
+        """Binary search the sorted term dictionary; -1 if absent"""
+        target = token.encode('utf-8')
+        terms, offsets = self._terms, self._term_offsets
+        lo, hi = 0, self.n_terms
+        while lo < hi:
+            mid = (lo + hi) // 2
+            term = terms[offsets[mid]:offsets[mid + 1]].tobytes()
+            if term < target:
+                lo = mid + 1
+            elif term > target:
+                hi = mid
+            else:
+                return mid
+        return -1
+
+    def terms(self):
+        """Every indexed term, in term id order"""
+        return [self._terms[self._term_offsets[i]:self._term_offsets[i + 1]].tobytes().decode('utf-8')
+                for i in range(self.n_terms)]
+
+    def iter_postings(self):
+        starts = self._term_starts
+        for term_id, term in enumerate(self.terms()):
+            yield term, self._doc_ids[starts[term_id]:starts[term_id + 1]], self._tfs[starts[term_id]:starts[term_id + 1]]
+
+    def export_postings(self):
+        return self._term_starts, self._idf, self._doc_ids, self._tfs
+
+    def _lookup(self, term_id):
+        start, end = self._term_starts[term_id], self._term_starts[term_id + 1]
+        return self._idf[term_id], self._max_impact[term_id], self._doc_ids[start:end], self._tfs[start:end]
+
+
+# ============ NUMPY BACKEND ============
+def _numpy():
+    """NumPy module if installed, else None (the backend is optional)"""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class SparseBM25:
+    """Vectorized scorer over a fitted BM25: the matrix of BM25 weights, precomputed.
+
+    Weights are stored term-major (CSR over terms x documents, i.e. the
+    documents x terms matrix in CSC form) because a query touches only a
+    handful of terms. Scoring a query, or a batch of them, gathers the rows of
+    its terms and sums them per document with one bincount - the sparse
+    matrix-vector product - and top-k comes from a partition instead of a
+    sort. Contributions are added in query-token order, so scores match the
+    pure-Python path exactly.
+    """
+
+    # Upper bound on queries x documents scores held in memory at once during score_batch
+    BATCH_CELLS = 1 << 22
+
+    def __init__(self, bm25):
+        np = _numpy()
+        if np is None:
+            raise ImportError("The numpy backend requires NumPy: pip install numpy")
+        self.np = np
+        self.bm25 = bm25
+        self.N = bm25.N
+
+        starts, idf, doc_ids, tfs = bm25.export_postings()
+        self.indptr = np.asarray(starts, dtype=np.int64)
+        self.indices = np.asarray(doc_ids, dtype=np.int64)
+        tf = np.asarray(tfs, dtype=np.float64)
+        row = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int64), np.diff(self.indptr))
+        norms = np.asarray(bm25.norms, dtype=np.float64)
+        self.data = np.asarray(idf, dtype=np.float64)[row] * (tf * (bm25.k1 + 1)) / (tf + norms[self.indices])
+
+    def tokenize(self, text):
+        return self.bm25.tokenize(text)
+
+    def _matvec(self, queries):
+        """queries x documents score matrix"""
+        np = self.np
+        doc_parts, weight_parts = [], []
+        for j, query in enumerate(queries):
+            # Rows are the index's own term ids
+            for term_id in self.bm25.query_vector(query):
+                start, end = self.indptr[term_id], self.indptr[term_id + 1]
+                doc_parts.append(self.indices[start:end] + j * self.N)
+                weight_parts.append(self.data[start:end])
+        if not doc_parts:
+            return np.zeros((len(queries), self.N), dtype=np.float64)
+        flat = np.bincount(np.concatenate(doc_parts), weights=np.concatenate(weight_parts),
+                           minlength=len(queries) * self.N)
+        return flat.reshape(len(queries), self.N)
+
+    def _top(self, scores, k):
+        """Best k (doc_id, score) with score > 0; ties go to the lower doc id"""
+        np = self.np
+        k = min(k, int(np.count_nonzero(scores > 0)))
+        if k <= 0:
+            return []
+        kth = np.partition(scores, self.N - k)[self.N - k]
+        above = np.flatnonzero(scores > kth)
+        ties = np.flatnonzero(scores == kth)[:k - len(above)]
+        idx = np.concatenate((above, ties))
+        idx = idx[np.lexsort((idx, -scores[idx]))]
+        return [(int(i), float(scores[i])) for i in idx]
+
+    def score(self, query):
+        return self.top_k(query, self.N)
+
+    def top_k(self, query, k):
+        return self.score_batch([query], k)[0]
+
+    def score_batch(self, queries, k):
+        """top_k for many queries, scored in chunks of one matrix product each"""
+        if self.N == 0 or k <= 0:
+            return [[] for _ in queries]
+        chunk = max(1, self.BATCH_CELLS // self.N)
+        results = []
+        for i in range(0, len(queries), chunk):
+            scores = self._matvec(queries[i:i + chunk])
+            results.extend(self._top(row, k) for row in scores)
+        return results
+
+
+def _scorer(bm25):
+    """The index itself, or its cached SparseBM25 view when the numpy backend is on"""
+    if SCORING_BACKEND != "numpy":
+        return bm25
+    sparse = getattr(bm25, "_sparse", None)
+    if sparse is None:
+        sparse = bm25._sparse = SparseBM25(bm25)
+    return sparse
+
+
+def set_backend(name):
+    """Select "python" (default) or "numpy" scoring for all searches"""
+    global SCORING_BACKEND
+    if name not in SCORING_BACKENDS:
+        raise ValueError(f"Unknown backend: {name}. Available: {', '.join(SCORING_BACKENDS)}")
+    if name == "numpy" and _numpy() is None:
+        raise ImportError("The numpy backend requires NumPy: pip install numpy")
+    SCORING_BACKEND = name
+
+
+def _backend_from_env():
+    """Apply UIPRO_BACKEND once at import; an unusable value keeps python scoring, with a warning"""
+    name = os.environ.get("UIPRO_BACKEND")
+    if not name:
+        return
+    try:
+        set_backend(name)
+    except (ValueError, ImportError) as e:
+        print(f"Warning: UIPRO_BACKEND ignored ({e}); using the python backend", file=sys.stderr)
+
+
+_backend_from_env()
+
+
+# ============ INCREMENTAL UPDATES ============
+# Once new, edited and deleted rows exceed this fraction of the corpus, the
+# delta is merged into a new base segment
+DELTA_MERGE_RATIO = 0.25
+
+
+def _row_hash(document, row):
+    """64-bit hash of what the index keeps of a row: its search text and output columns"""
+    data = "\x1e".join([document, *(f"{col}\x1f{value}" for col, value in row.items())]).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def _index_rows(data, search_cols, output_cols):
+    """(documents, row_hashes) for parsed CSV rows"""
+    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    hashes = array('Q')
+    for doc, row in zip(documents, data):
+        hashes.append(_row_hash(doc, {col: row.get(col, "") for col in output_cols if col in row}))
+    return documents, hashes
+
+
+class BM25Delta(BM25):
+    """Read-only view of a base index plus a delta index of new and edited rows.
+
+    sources[i] says where the document of current CSV row i lives: base doc
+    `s` for s >= 0, delta doc `-s - 1` otherwise; base docs missing from
+    sources were deleted. N, avgdl and document frequencies are those of the
+    current rows, and each term's postings are merged (and its idf and max
+    impact computed) on first use, so scores and rankings equal a full refit.
+    """
+
+    def __init__(self, base, delta, sources, rows):
+        super().__init__(base.k1, base.b)
+        self.base = base
+        self.delta = delta
+        self.sources = sources
+        self._base_pos = array('q', [-1]) * base.N
+        self._delta_pos = array('q', [-1]) * delta.N
+        for pos, source in enumerate(sources):
+            if source >= 0:
+                self._base_pos[source] = pos
+            else:
+                self._delta_pos[-source - 1] = pos
+
+        self.doc_lengths = array('I', [base.doc_lengths[s] if s >= 0 else delta.doc_lengths[-s - 1] for s in sources])
+        self.N = len(self.doc_lengths)
+        if self.N:
+            self.avgdl = sum(self.doc_lengths) / self.N
+            self.norms = [self.k1 * (1 - self.b + self.b * dl / self.avgdl) for dl in self.doc_lengths]
+        self.rows = rows
+        self._lock = threading.Lock()
+
+    @property
+    def changed(self):
+        """New or edited rows plus deleted ones"""
+        return self.delta.N + (self.base.N - sum(1 for s in self.sources if s >= 0))
+
+    def fit(self, documents):
+        raise TypeError("BM25Delta is read-only")
+
+    def _term_id(self, token):
+        term_id = self.vocab.get(token)
+        if term_id is None:
+            with self._lock:
+                term_id = self.vocab.get(token)
+                if term_id is None:
+                    term_id = self._merge_term(token)
+                    if term_id is None:  # Unknown to both indexes: not cached, or query words would pile up
+                        return -1
+                    self.vocab[token] = term_id
+        return term_id
+
+    def _merge_term(self, token):
+        """Id of the term's merged postings; -1 if no current row contains it, None if neither index has it"""
+        merged = []
+        known = False
+        for index, positions in ((self.base, self._base_pos), (self.delta, self._delta_pos)):
+            term_id = index._term_id(token)
+            if term_id >= 0:
+                known = True
+                _, _, doc_ids, tfs = index._lookup(term_id)
+                merged.extend((positions[d], tf) for d, tf in zip(doc_ids, tfs) if positions[d] >= 0)
+        if not merged:
+            return -1 if known else None
+        merged.sort()
+        doc_ids, tfs = array('I', [d for d, _ in merged]), array('I', [tf for _, tf in merged])
+        idf, max_impact = self._term_weights(doc_ids, tfs)
+        self.postings.append((doc_ids, tfs))
+        self.doc_freqs.append(len(doc_ids))
+        self.idf.append(idf)
+        self.max_impact.append(max_impact)
+        return len(self.postings) - 1
+
+    def _all_terms(self):
+        terms = self.base.terms() if hasattr(self.base, "terms") else list(self.base.vocab)
+        terms += self.delta.terms() if hasattr(self.delta, "terms") else list(self.delta.vocab)
+        return dict.fromkeys(terms)
+
+    def iter_postings(self):
+        for token in self._all_terms():
+            term_id = self._term_id(token)
+            if term_id >= 0:
+                doc_ids, tfs = self.postings[term_id]
+                yield token, doc_ids, tfs
+
+    def export_postings(self):
+        for token in self._all_terms():
+            self._term_id(token)
+        return super().export_postings()
+
+    def compact(self):
+        """Equivalent fitted BM25 over the current rows, built without retokenizing"""
+        return merge_indexes([self])
+
+
+def merge_indexes(indexes):
+    """One fitted BM25 over the documents of several indexes, in order, built from their postings.
+
+    Nothing is retokenized; idf and avgdl are recomputed for the combined
+    corpus. k1 and b come from the first index.
+    """
+    bm25 = BM25(indexes[0].k1, indexes[0].b) if indexes else BM25()
+    vocab, postings = bm25.vocab, bm25.postings
+    offset = 0
+    for index in indexes:
+        for term, doc_ids, tfs in index.iter_postings():
+            term_id = vocab.get(term)
+            if term_id is None:
+                term_id = vocab[term] = len(postings)
+                postings.append((array('I'), array('I')))
+            merged_ids, merged_tfs = postings[term_id]
+            merged_ids.extend([d + offset for d in doc_ids] if offset else doc_ids)
+            merged_tfs.extend(tfs)
+        bm25.doc_lengths.extend(index.doc_lengths)
+        offset += index.N
+    bm25._finish()
+    return bm25
+
+
+def _update_index(filepath, base, search_cols, output_cols):
+    """BM25Delta of a CSV against the base index of an earlier version of it.
+
+    Rows are matched to base rows by row hash (duplicates in order); only
+    rows with no match are tokenized and fitted. Returns (index, row_hashes)
+    with the hashes of every current row.
+    """
+    with PROFILER.stage("csv_load"):
+        fieldnames, data, offsets = _scan_csv(filepath)
+    documents, hashes = _index_rows(data, search_cols, output_cols)
+
+    unmatched = defaultdict(list)
+    for doc_id in range(base.N - 1, -1, -1):
+        unmatched[base.row_hashes[doc_id]].append(doc_id)
+    sources = array('q')
+    new = []
+    for i, row_hash in enumerate(hashes):
+        candidates = unmatched.get(row_hash)
+        if candidates:
+            sources.append(candidates.pop())
+        else:
+            sources.append(-len(new) - 1)
+            new.append(i)
 
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
-            for word in doc:
-                term_freqs[word] += 1
+    delta = BM25(base.k1, base.b)
+    delta.fit([documents[i] for i in new])
+    rows = _CSVRows(filepath, fieldnames, offsets, output_cols)
+    return BM25Delta(base, delta, sources, rows), hashes
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
 
-            scores.append((idx, score))
+# ============ INDEX REGISTRY ============
+def _file_digest(filepath):
+    """SHA-256 of the file contents"""
+    with open(filepath, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
-        return sorted(scores, key=lambda x: x[1], reverse=True)
+
+def _index_path(filepath):
+    """On-disk segment path for a data file (stacks/react.csv -> stacks__react.seg)"""
+    try:
+        rel = Path(filepath).relative_to(DATA_DIR)
+    except ValueError:
+        rel = Path(Path(filepath).name)
+    return INDEX_DIR / ("__".join(rel.with_suffix("").parts) + ".seg")
+
+
+def _delta_path(path):
+    """Delta segment next to a base segment (styles.seg -> styles.delta.seg)"""
+    return path.with_suffix(".delta.seg")
+
+
+def _build_index(filepath, search_cols, output_cols):
+    """Parse CSV, fit BM25 over search columns, locate rows for hydration; returns (bm25, rows, row_hashes)"""
+    with PROFILER.stage("csv_load"):
+        fieldnames, data, offsets = _scan_csv(filepath)
+
+    # Build documents from search columns
+    documents, hashes = _index_rows(data, search_cols, output_cols)
+
+    bm25 = BM25()
+    bm25.fit(documents)
+    return bm25, _CSVRows(filepath, fieldnames, offsets, output_cols), hashes
+
+
+def _open_segment(path, key=None):
+    """Map a segment if it exists and matches key (any key if None), else None"""
+    try:
+        segment = BM25Segment(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if key is not None and segment.key != key:
+        return None
+    return segment
+
+
+def _remove(path):
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+def _sources():
+    """(name, filepath, search_cols, output_cols) of every domain, then every stack as "stack:<name>" """
+    for domain, config in CSV_CONFIG.items():
+        yield domain, DATA_DIR / config["file"], config["search_cols"], config["output_cols"]
+    for stack, config in STACK_CONFIG.items():
+        yield f"stack:{stack}", DATA_DIR / config["file"], _STACK_COLS["search_cols"], _STACK_COLS["output_cols"]
+
+
+class UnifiedIndex:
+    """Every domain and stack in one BM25, for a global top-k across them.
+
+    Merged from the per-file indexes (see merge_indexes), so idf and avgdl
+    are those of the combined corpus and scores compare across domains.
+    Documents are numbered source by source; source_of[doc_id] is the index
+    of the doc's source in names/files/rows.
+    """
+
+    def __init__(self, bm25, names, files, rows, digest):
+        self.bm25 = bm25
+        self.names = names
+        self.files = files
+        self.rows = rows
+        self.digest = digest
+        self.starts = array('I', [0])
+        self.source_of = array('H')
+        for i, source_rows in enumerate(rows):
+            self.starts.append(self.starts[-1] + len(source_rows))
+            self.source_of.extend(array('H', [i]) * len(source_rows))
+
+    def locate(self, doc_id):
+        """(source index, row index within that source's CSV)"""
+        source = self.source_of[doc_id]
+        return source, doc_id - self.starts[source]
+
+
+class IndexRegistry:
+    """Process-wide home for everything loaded from the data CSVs.
+
+    Each CSV is parsed, fitted (or its segment mapped) at most once per
+    content digest; later lookups cost one stat() of the file. Besides BM25
+    indexes it holds other per-file derived data, such as the design system
+    reasoning rules, through derived().
+    """
+
+    def __init__(self):
+        self._digests = {}   # filepath -> (stat signature, digest)
+        self._entries = {}   # key -> (digest, value)
+        self._lock = threading.RLock()
+
+    def digest(self, filepath):
+        """Digest of a data file, rehashed only when its mtime or size changes"""
+        st = os.stat(filepath)
+        signature = (st.st_mtime_ns, st.st_size)
+        cached = self._digests.get(str(filepath))
+        if cached and cached[0] == signature:
+            return cached[1]
+        digest = _file_digest(filepath)
+        self._digests[str(filepath)] = (signature, digest)
+        return digest
+
+    def derived(self, filepath, name, build):
+        """build(filepath, digest), cached until the file's contents change"""
+        key = (name, str(filepath))
+        digest = self.digest(filepath)
+        cached = self._entries.get(key)
+        if cached and cached[0] == digest:
+            return cached[1]
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and cached[0] == digest:
+                return cached[1]
+            value = build(filepath, digest)
+            self._entries[key] = (digest, value)
+            return value
+
+    def index(self, filepath, search_cols, output_cols):
+        """(bm25, rows, digest) for a CSV, from memory, its segment, or a fresh fit"""
+        def build(filepath, digest):
+            return self._load_segment(filepath, search_cols, output_cols, digest) + (digest,)
+
+        return self.derived(filepath, ("index", tuple(search_cols), tuple(output_cols)), build)
+
+    def unified(self):
+        """UnifiedIndex over every domain and stack, rebuilt when any of their files changes"""
+        parts = [(name, filepath, self.index(filepath, search_cols, output_cols))
+                 for name, filepath, search_cols, output_cols in _sources() if filepath.exists()]
+        digest = hashlib.sha256("\n".join(f"{name}:{index[2]}" for name, _, index in parts).encode()).hexdigest()
+        cached = self._entries.get("unified")
+        if cached and cached[0] == digest:
+            return cached[1]
+        with self._lock:
+            cached = self._entries.get("unified")
+            if cached and cached[0] == digest:
+                return cached[1]
+            key = [INDEX_VERSION, digest, "unified", sys.byteorder]
+            path = INDEX_DIR / "unified.seg"
+            with PROFILER.stage("segment_load"):
+                bm25 = _open_segment(path, key)
+            if bm25 is None:
+                with PROFILER.stage("merge"):
+                    bm25 = merge_indexes([index[0] for _, _, index in parts])
+                try:
+                    with PROFILER.stage("segment_write"):
+                        path.parent.mkdir(parents=True, exist_ok=True)
+                        write_segment(path, bm25, None, key)
+                        bm25 = _open_segment(path, key) or bm25
+                except OSError:
+                    pass  # Read-only data dir: keep the in-memory merge
+            unified = UnifiedIndex(bm25, [name for name, _, _ in parts],
+                                   [str(filepath.relative_to(DATA_DIR)) for _, filepath, _ in parts],
+                                   [index[1] for _, _, index in parts], digest)
+            self._entries["unified"] = (digest, unified)
+            return unified
+
+    @staticmethod
+    def _load_segment(filepath, search_cols, output_cols, digest):
+        """Current base segment; else the last base plus a delta of the rows changed since
+        (merged into a new base once large); else a fresh fit"""
+        key = [INDEX_VERSION, digest, list(search_cols), list(output_cols), sys.byteorder]
+        path, delta_path = _index_path(filepath), _delta_path(_index_path(filepath))
+        with PROFILER.stage("segment_load"):
+            base = _open_segment(path)
+        if base is not None and base.key == key:
+            return base, base.csv_rows(filepath, output_cols)
+
+        if base is not None and base.key[:1] + base.key[2:] == key[:1] + key[2:]:
+            delta_key = key + [base.key[1]]
+            with PROFILER.stage("segment_load"):
+                delta = _open_segment(delta_path, delta_key)
+            if delta is not None:
+                index = BM25Delta(base, delta, delta.sources, delta.csv_rows(filepath, output_cols))
+                return index, index.rows
+
+            index, hashes = _update_index(filepath, base, search_cols, output_cols)
+            rows = index.rows
+            try:
+                if index.changed <= DELTA_MERGE_RATIO * index.N:
+                    with PROFILER.stage("segment_write"):
+                        write_segment(delta_path, index.delta, rows, delta_key,
+                                      (hashes[pos] for pos in index._delta_pos), index.sources)
+                        delta = _open_segment(delta_path, delta_key)
+                    if delta is not None:
+                        index = BM25Delta(base, delta, delta.sources, rows)
+                    return index, rows
+                with PROFILER.stage("merge"):
+                    bm25 = index.compact()
+            except OSError:
+                return index, rows  # Read-only data dir: serve from the in-memory view
+        else:
+            bm25, rows, hashes = _build_index(filepath, search_cols, output_cols)
+
+        segment = None
+        try:
+            with PROFILER.stage("segment_write"):
+                path.parent.mkdir(parents=True, exist_ok=True)
+                write_segment(path, bm25, rows, key, hashes)
+                _remove(delta_path)
+                segment = _open_segment(path, key)
+        except OSError:
+            pass  # Read-only data dir: serve from the in-memory index
+        return (segment or bm25), rows
+
+    def clear(self):
+        with self._lock:
+            self._digests.clear()
+            self._entries.clear()
+
+
+REGISTRY = IndexRegistry()
+
+
+def build_indexes():
+    """Load (building if needed) the index for every domain and stack, and the unified index; returns their file names"""
+    built = []
+    for _, filepath, search_cols, output_cols in _sources():
+        if filepath.exists():
+            REGISTRY.index(filepath, search_cols, output_cols)
+            built.append(str(filepath.relative_to(DATA_DIR)))
+    REGISTRY.unified()
+    return built
+
+
+# ============ RESULT CACHE ============
+class LRUCache:
+    """Thread-safe bounded LRU mapping with hit/miss/eviction counters"""
+
+    def __init__(self, maxsize=RESULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, version):
+        """Cached value for key if stored under the same data version, else None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (version, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "size": len(self._data), "maxsize": self.maxsize}
+
+
+# Results of _search_csv keyed by data file, columns, query terms and max_results;
+# each entry is tagged with the CSV digest so an edited file never serves stale rows
+RESULT_CACHE = LRUCache()
+
+
+# Optional cross-process SQLite cache (query_cache.QueryCache), see enable_query_cache()
+QUERY_CACHE = None
+
+
+def enable_query_cache(path=None, **options):
+    """Turn on the persistent query cache shared by every process on this machine"""
+    global QUERY_CACHE
+    from query_cache import QueryCache
+    QUERY_CACHE = QueryCache(Path(path) if path else INDEX_DIR / "queries.sqlite3", **options)
+    return QUERY_CACHE
+
+
+if os.environ.get(QUERY_CACHE_ENV):
+    enable_query_cache(None if os.environ[QUERY_CACHE_ENV] == "1" else os.environ[QUERY_CACHE_ENV])
+
+
+def _cache_get(key, version):
+    """Results from the in-process cache, else the persistent one (promoting the hit); None on miss"""
+    results = RESULT_CACHE.get(key, version)
+    if results is None and QUERY_CACHE is not None:
+        results = QUERY_CACHE.get(key, version)
+        if results is not None:
+            RESULT_CACHE.put(key, version, results)
+    return results
+
+
+def _cache_put(key, version, results):
+    RESULT_CACHE.put(key, version, results)
+    if QUERY_CACHE is not None:
+        QUERY_CACHE.put(key, version, results)
+
+
+def _normalize_query(query):
+    """Order-independent cache key for a query: sorted (term, count) pairs"""
+    counts = defaultdict(int)
+    for token in tokenize(query):
+        counts[token] += 1
+    return tuple(sorted(counts.items()))
 
 
 # ============ SEARCH FUNCTIONS ============
@@ -170,53 +1313,138 @@ def _search_csv(filepath, search_cols, output_cols, query, max_results):
     if not filepath.exists():
         return []
 
-    data = _load_csv(filepath)
+    # Both caches are checked before the index is touched; a hit needs only the file digest
+    with PROFILER.stage("cache_lookup"):
+        digest = REGISTRY.digest(filepath)
+        cache_key = (str(filepath), tuple(search_cols), tuple(output_cols), _normalize_query(query), max_results)
+        results = _cache_get(cache_key, digest)
+    if results is None:
+        bm25, rows, digest = REGISTRY.index(filepath, search_cols, output_cols)
+        with PROFILER.stage("score"):
+            ranked = _scorer(bm25).top_k(query, max_results)
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+        # Get top results with score > 0
+        with PROFILER.stage("hydrate"):
+            results = []
+            for idx, score in ranked:
+                if score > 0:
+                    results.append(dict(rows[idx]))
+        _cache_put(cache_key, digest, results)
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
+    with PROFILER.stage("hydrate"):
+        return [dict(row) for row in results]
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
 
-    return results
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
+    "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
+}
+DEFAULT_DOMAIN = "style"
+
+_INFLECTIONS = ("s", "es", "ing", "ed")
+
+
+def _routing_tables():
+    """(keyword -> domains, first words of two-word keywords, punctuated keywords)"""
+    owners = defaultdict(list)
+    for domain, keywords in DOMAIN_KEYWORDS.items():
+        for kw in keywords:
+            owners[kw].append(domain)
+    heads = {kw.split()[0] for kw in owners if " " in kw}
+    loose = [kw for kw in owners if kw != " ".join(kw.translate(_TOKEN_TABLE).split())]
+    return dict(owners), heads, loose
+
+
+_KEYWORD_DOMAINS, _BIGRAM_HEADS, _PUNCTUATED_KEYWORDS = _routing_tables()
+
+
+def _keyword(text):
+    """text, or text without an s/es/ing/ed ending, when that is a routing keyword; else None"""
+    if text in _KEYWORD_DOMAINS:
+        return text
+    for suffix in _INFLECTIONS:
+        if text.endswith(suffix) and text[:-len(suffix)] in _KEYWORD_DOMAINS:
+            return text[:-len(suffix)]
+    return None
+
+
+def _word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+def _has_punctuated(query, kw):
+    """True when kw occurs in query with the same edges as a word keyword:
+    not inside a word, optionally inflected ("#" has no word edges and matches anywhere)"""
+    start = query.find(kw)
+    while start >= 0:
+        end = start + len(kw)
+        if not (start and _word_char(kw[0]) and _word_char(query[start - 1])):
+            if not _word_char(kw[-1]):
+                return True
+            for suffix in ("",) + _INFLECTIONS:
+                if query.startswith(suffix, end) and not (end + len(suffix) < len(query) and _word_char(query[end + len(suffix)])):
+                    return True
+        start = query.find(kw, start + 1)
+    return False
+
+
+def route(query):
+    """Candidate domains for a query, best first, as [(domain, confidence)].
+
+    Keywords match whole words ("bar" does not match "navbar") and may carry
+    an inflection (charts, scrolling); two-word keywords match adjacent words
+    and take precedence over their parts, and punctuated keywords such as
+    "#" match anywhere. A domain scores one point per distinct keyword
+    matched, and confidence is its share of all points (ties keep
+    DOMAIN_KEYWORDS order). Empty when nothing matches. Callers can fan out,
+    e.g. search_all(query, [d for d, _ in route(query)[:2]]).
+    """
+    query = query.lower()
+    words = query.translate(_TOKEN_TABLE).split()
+    matched = {kw for kw in _PUNCTUATED_KEYWORDS if kw in query and _has_punctuated(query, kw)}
+    i, n = 0, len(words)
+    while i < n:
+        if words[i] in _BIGRAM_HEADS and i + 1 < n:
+            kw = _keyword(f"{words[i]} {words[i + 1]}")
+            if kw:
+                matched.add(kw)
+                i += 2
+                continue
+        kw = _keyword(words[i])
+        if kw:
+            matched.add(kw)
+        i += 1
+    if not matched:
+        return []
+    scores = dict.fromkeys(DOMAIN_KEYWORDS, 0)
+    total = 0
+    for kw in matched:
+        for domain in _KEYWORD_DOMAINS[kw]:
+            scores[domain] += 1
+            total += 1
+    return [(domain, score / total) for domain, score in sorted(scores.items(), key=lambda x: -x[1]) if score]
 
 
 def detect_domain(query):
     """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "animation", "keyboard", "navigation", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "react": ["react", "next.js", "nextjs", "suspense", "memo", "usecallback", "useeffect", "rerender", "bundle", "waterfall", "barrel", "dynamic import", "rsc", "server component"],
-        "web": ["aria", "focus", "outline", "semantic", "virtualize", "autocomplete", "form", "input type", "preconnect"]
-    }
-
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "style"
+    candidates = route(query)
+    return candidates[0][0] if candidates else DEFAULT_DOMAIN
 
 
 def search(query, domain=None, max_results=MAX_RESULTS):
     """Main search function with auto-domain detection"""
     if domain is None:
-        domain = detect_domain(query)
+        with PROFILER.stage("detect_domain"):
+            domain = detect_domain(query)
 
     config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
     filepath = DATA_DIR / config["file"]
@@ -255,3 +1483,249 @@ def search_stack(query, stack, max_results=MAX_RESULTS):
         "count": len(results),
         "results": results
     }
+
+
+def search_stacks(query, stacks=None, max_results=MAX_RESULTS):
+    """search_stack() over several stacks (default: all) concurrently, one thread per stack.
+
+    Returns a per-stack report: each stack's search_stack() result, in the
+    order given, with its latency_ms, plus the wall time of the whole fan-out.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    stacks = list(dict.fromkeys(stacks or AVAILABLE_STACKS))
+    unknown = [stack for stack in stacks if stack not in STACK_CONFIG]
+    if unknown:
+        return {"error": f"Unknown stack: {', '.join(unknown)}. Available: {', '.join(AVAILABLE_STACKS)}"}
+
+    def timed(stack):
+        start = perf_counter()
+        with PROFILER.stage(f"stack.{stack}"):
+            result = search_stack(query, stack, max_results)
+        return dict(result, latency_ms=round((perf_counter() - start) * 1000, 3))
+
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=min(len(stacks), STACK_WORKERS)) as pool:
+        reports = list(pool.map(timed, stacks))
+
+    return {
+        "domain": "stacks",
+        "stacks": stacks,
+        "query": query,
+        "count": sum(report.get("count", 0) for report in reports),
+        "latency_ms": round((perf_counter() - start) * 1000, 3),
+        "results": reports
+    }
+
+
+def search_all(query, domains=None, max_results=MAX_RESULTS):
+    """Global top results across every domain and stack, scored in one pass over the unified index.
+
+    domains optionally restricts the search to CSV_CONFIG domains and stacks
+    (as "stack:<name>"; "stack" selects every stack). Each result carries its
+    domain, file and score next to the row itself.
+    """
+    unified = REGISTRY.unified()
+    selected = None
+    if domains:
+        selected = []
+        for name in domains:
+            names = [n for n in unified.names if n.startswith("stack:")] if name == "stack" else [name]
+            for n in names:
+                if n not in unified.names:
+                    return {"error": f"Unknown domain: {name}. Available: {', '.join(unified.names)}"}
+                if n not in selected:
+                    selected.append(n)
+
+    with PROFILER.stage("cache_lookup"):
+        cache_key = ("unified", tuple(selected) if selected else None, _normalize_query(query), max_results)
+        results = _cache_get(cache_key, unified.digest)
+    if results is None:
+        bm25 = unified.bm25
+        with PROFILER.stage("score"):
+            if selected is None:
+                ranked = _scorer(bm25).top_k(query, max_results)
+            else:
+                # Filtered: accumulate once, keep the selected sources' documents
+                allowed = {unified.names.index(n) for n in selected}
+                source_of = unified.source_of
+                scores = bm25._accumulate(bm25.query_vector(query))
+                ranked = nsmallest(max_results, ((d, s) for d, s in scores.items() if source_of[d] in allowed),
+                                   key=lambda x: (-x[1], x[0]))
+
+        with PROFILER.stage("hydrate"):
+            results = []
+            for doc_id, score in ranked:
+                if score > 0:
+                    source, row = unified.locate(doc_id)
+                    results.append({"domain": unified.names[source], "file": unified.files[source],
+                                    "score": round(score, 4), "row": dict(unified.rows[source][row])})
+        _cache_put(cache_key, unified.digest, results)
+
+    return {
+        "domain": "all",
+        "domains": selected or unified.names,
+        "query": query,
+        "count": len(results),
+        "results": [dict(r, row=dict(r["row"])) for r in results]
+    }
+
+
+# ============ TYPEAHEAD ============
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SuggestIndex:
+    """Prefix and trigram index over one name column.
+
+    Each name is filed in one sorted list under its lowered text and under
+    every later word start ("liquid glass" also as "glass"), so a prefix is
+    a bisect plus a scan over the names it completes. When those run short,
+    names sharing two thirds of the typed text's trigrams (and at least two)
+    fill in, which tolerates typos and infixes.
+    """
+
+    def __init__(self, names):
+        self.names = list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+        keys = []
+        self._trigrams = defaultdict(list)   # trigram -> name ids
+        for i, name in enumerate(self.names):
+            lowered = name.lower()
+            keys.append((lowered, i, 0))
+            for pos in range(1, len(lowered)):
+                if lowered[pos].isalnum() and not lowered[pos - 1].isalnum():
+                    keys.append((lowered[pos:], i, 1))
+            for gram in _trigrams(lowered):
+                self._trigrams[gram].append(i)
+        keys.sort()
+        self._keys = [key for key, _, _ in keys]
+        self._ranks = [(tier, 0, len(self.names[i]), i) for _, i, tier in keys]
+
+    def matches(self, prefix, k):
+        """Up to k (rank, name) pairs, best first: whole-name prefix, word prefix, then trigram overlap"""
+        prefix = prefix.strip().lower()
+        if not prefix or k <= 0:
+            return []
+        ranked = {}   # name id -> rank
+        keys, names = self._keys, self.names
+        for pos in range(bisect_left(keys, prefix), len(keys)):
+            if not keys[pos].startswith(prefix):
+                break
+            rank = self._ranks[pos]
+            i = rank[3]
+            if rank < ranked.get(i, (2,)):
+                ranked[i] = rank
+        if len(ranked) < k and len(prefix) >= 3:
+            grams = _trigrams(prefix)
+            shared = Counter(i for gram in grams for i in self._trigrams.get(gram, ()))
+            need = max(2, (2 * len(grams) + 2) // 3)
+            for i, count in shared.items():
+                if count >= need and i not in ranked:
+                    ranked[i] = (2, -count, len(names[i]), i)
+        return [(rank, names[i]) for i, rank in nsmallest(k, ranked.items(), key=lambda x: x[1])]
+
+
+def _suggest_index(domain):
+    """SuggestIndex of a domain's SUGGEST_COLS column, rebuilt when its CSV changes"""
+    col = SUGGEST_COLS[domain]
+
+    def build(filepath, digest):
+        return SuggestIndex(row.get(col, "") for row in _load_csv(filepath))
+
+    return REGISTRY.derived(DATA_DIR / CSV_CONFIG[domain]["file"], ("suggest", col), build)
+
+
+def suggest(prefix, domain=None, k=SUGGEST_RESULTS):
+    """Typeahead over style, color/product, font pairing, icon and landing pattern names.
+
+    Names starting with the prefix rank first, then names with a later word
+    starting with it, then trigram matches; shorter names first within each.
+    Without a domain every SUGGEST_COLS domain is searched and merged; a name
+    found in several domains (color and product share "Product Type") is
+    listed once, at its best rank, with every domain it came from.
+    """
+    if domain is not None and domain not in SUGGEST_COLS:
+        return {"error": f"Unknown domain: {domain}. Available: {', '.join(SUGGEST_COLS)}"}
+
+    domains = [domain] if domain else list(SUGGEST_COLS)
+    candidates = []
+    for n, name in enumerate(domains):
+        if (DATA_DIR / CSV_CONFIG[name]["file"]).exists():
+            candidates += [(rank[:3] + (n,) + rank[3:], match, name) for rank, match in _suggest_index(name).matches(prefix, k)]
+    merged = {}
+    for _, match, name in sorted(candidates):
+        if len(merged) == k and match not in merged:
+            continue
+        sources = merged.setdefault(match, [])
+        if name not in sources:
+            sources.append(name)
+    suggestions = [{"name": match, "domain": sources[0], "domains": sources} for match, sources in merged.items()]
+
+    return {
+        "domain": domain or "all",
+        "prefix": prefix,
+        "count": len(suggestions),
+        "suggestions": suggestions
+    }
+
+
+# ============ ASYNC API ============
+_INFLIGHT = {}  # (event loop, request key) -> executor future shared by identical concurrent requests
+_WARM = set()   # data files whose index has already been awaited
+
+
+async def _shared(key, fn, *args):
+    """Await fn(*args) on the loop's default executor, at most one call per key in flight.
+
+    Identical concurrent requests await the same future and so receive the
+    same result object (see _own_copy); shield() keeps one cancelled caller
+    from cancelling the others.
+    """
+    import asyncio
+    loop = asyncio.get_running_loop()
+    slot = (loop, key)
+    future = _INFLIGHT.get(slot)
+    if future is None:
+        future = _INFLIGHT[slot] = loop.run_in_executor(None, fn, *args)
+        future.add_done_callback(lambda _: _INFLIGHT.pop(slot, None))
+    return await asyncio.shield(future)
+
+
+def _own_copy(result):
+    """A search result private to one de-duplicated caller: the per-row copy _search_csv makes"""
+    if isinstance(result, dict) and "results" in result:
+        return dict(result, results=[dict(row) for row in result["results"]])
+    return result
+
+
+async def _warm(filepath, load, *args):
+    """Await load(*args), which loads filepath's index or rules, once per process"""
+    if filepath not in _WARM and filepath.exists():
+        await _shared(("warm", str(filepath)), load, *args)
+        _WARM.add(filepath)
+
+
+async def async_build_indexes():
+    """build_indexes() on the executor; lets a service warm everything at startup"""
+    await _shared(("build_indexes",), build_indexes)
+    _WARM.update(filepath for _, filepath, _, _ in _sources() if filepath.exists())
+
+
+async def async_search(query, domain=None, max_results=MAX_RESULTS):
+    """search() without blocking the event loop"""
+    if domain is None:
+        domain = detect_domain(query)
+    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+    filepath = DATA_DIR / config["file"]
+    await _warm(filepath, REGISTRY.index, filepath, config["search_cols"], config["output_cols"])
+    return _own_copy(await _shared(("search", query, domain, max_results), search, query, domain, max_results))
+
+
+async def async_search_stack(query, stack, max_results=MAX_RESULTS):
+    """search_stack() without blocking the event loop"""
+    if stack not in STACK_CONFIG:
+        return search_stack(query, stack, max_results)
+    filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
+    await _warm(filepath, REGISTRY.index, filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"])
+    return _own_copy(await _shared(("search_stack", query, stack, max_results), search_stack, query, stack, max_results))
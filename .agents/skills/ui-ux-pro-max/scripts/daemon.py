@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Daemon - keeps every index warm and answers queries over a Unix socket
+
+Usage:
+    python search.py --serve                 # start the daemon (foreground)
+    python search.py "<query>" ...           # forwarded to the daemon when it is running
+
+Protocol: one JSON object per line in each direction.
+    {"op": "search", "query": ..., "domain": ..., "max_results": ...}
+    {"op": "search_stack", "query": ..., "stack": ..., "max_results": ...}
+    {"op": "search_stacks", "query": ..., "stacks": [...] | null, "max_results": ...}
+    {"op": "search_all", "query": ..., "domains": [...] | null, "max_results": ...}
+    {"op": "semantic_search", "query": ..., "domain": ... | null, "max_results": ..., "alpha"?: ...}
+    {"op": "suggest", "prefix": ..., "domain": ... | null, "k": ...}
+    {"op": "design_system", "query": ..., "project_name": ..., "format": "ascii" | "markdown"}
+    {"op": "ping"}
+Every request also carries "instance": instance_id() of the client's scripts;
+the daemon rejects requests for another data directory or index version.
+Replies are {"ok": true, "result": ...} or {"ok": false, "error": "..."}.
+"""
+
+import hashlib
+import json
+import os
+import socket
+import stat
+import sys
+
+
+# ============ CONFIGURATION ============
+SOCKET_ENV = "UIPRO_SOCKET"
+SOCKET_NAME = "ui-pro-max-{instance}.sock"
+CONNECT_TIMEOUT = 0.2    # seconds; a missing daemon must not slow the fallback path
+REQUEST_TIMEOUT = 30.0
+
+
+_INSTANCE = None
+
+
+def instance_id():
+    """Hash of the data directory and index version served by this copy of the scripts.
+
+    Part of the socket name and of every request, so a search.py from another
+    skill checkout (or an upgraded one) never gets answers from this daemon.
+    """
+    global _INSTANCE
+    if _INSTANCE is None:
+        from core import DATA_DIR, INDEX_VERSION
+        _INSTANCE = hashlib.sha1(f"{DATA_DIR.resolve()}|{INDEX_VERSION}".encode('utf-8')).hexdigest()[:16]
+    return _INSTANCE
+
+
+def _private_dir(path, create=False):
+    """True when path is a directory only the current user can enter (created 0700 if asked)"""
+    if create:
+        try:
+            os.mkdir(path, 0o700)
+        except FileExistsError:
+            pass
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def _owned_socket(path):
+    """True when path is a socket owned by the current user (never follows symlinks)"""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISSOCK(st.st_mode) and st.st_uid == os.getuid()
+
+
+def socket_path(create=False):
+    """Per-user, per-instance socket path, overridable with UIPRO_SOCKET; None when no private directory is available.
+
+    The socket lives in $XDG_RUNTIME_DIR, or else in a 0700 ui-pro-max-<uid>
+    directory under the temp dir, so other local users can neither plant a
+    socket at the path nor connect to ours. The temp dir is resolved from the
+    environment rather than tempfile.gettempdir(): every client call needs
+    it, and the tempfile import alone costs several ms.
+    """
+    if os.environ.get(SOCKET_ENV):
+        return os.environ[SOCKET_ENV]
+    if not hasattr(os, "getuid"):
+        return None
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime and _private_dir(runtime):
+        return os.path.join(runtime, SOCKET_NAME.format(instance=instance_id()))
+    tmp = os.environ.get("TMPDIR") or os.environ.get("TEMP") or os.environ.get("TMP") or "/tmp"
+    directory = os.path.join(tmp, f"ui-pro-max-{os.getuid()}")
+    if not _private_dir(directory, create):
+        return None
+    return os.path.join(directory, SOCKET_NAME.format(instance=instance_id()))
+
+
+# ============ CLIENT ============
+def request(payload, path=None):
+    """Send one request to the daemon; None when no trusted daemon for this instance is reachable"""
+    if not hasattr(socket, "AF_UNIX"):
+        return None
+    path = path or socket_path()
+    if not path or not _owned_socket(path):
+        return None
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CONNECT_TIMEOUT)
+            sock.connect(path)
+            sock.settimeout(REQUEST_TIMEOUT)
+            payload = dict(payload, instance=instance_id())
+            sock.sendall(json.dumps(payload, ensure_ascii=False).encode('utf-8') + b"\n")
+            with sock.makefile('rb') as f:
+                line = f.readline()
+        reply = json.loads(line) if line else None
+    except (OSError, ValueError):
+        return None
+    if not isinstance(reply, dict) or not reply.get("ok"):
+        return None
+    return reply.get("result")
+
+
+# ============ SERVER ============
+def warm_up():
+    """Load every domain, stack and the reasoning rules; returns the design system generator,
+    or None when design_system cannot be imported (searches are still served)"""
+    from core import build_indexes
+    build_indexes()
+    try:
+        from semantic import semantic_index
+        semantic_index(build=False)  # Keep the LSA model warm when it has been built
+    except ImportError:
+        pass
+    try:
+        from design_system import DesignSystemGenerator
+    except (ImportError, SyntaxError) as e:  # design_system.py needs Python 3.12+
+        print(f"Warning: design system requests disabled ({type(e).__name__}: {e})", file=sys.stderr)
+        return None
+    return DesignSystemGenerator()
+
+
+def handle(payload, generator):
+    """Execute one request against the warm in-process indexes"""
+    from core import MAX_RESULTS, SUGGEST_RESULTS, search, search_all, search_stack, search_stacks, suggest
+
+    if payload.get("instance") != instance_id():
+        raise ValueError("Request is for another data directory or index version")
+    op = payload.get("op")
+    if op == "ping":
+        return {"pid": os.getpid()}
+    if op == "search":
+        return search(payload["query"], payload.get("domain"), payload.get("max_results", MAX_RESULTS))
+    if op == "search_stack":
+        return search_stack(payload["query"], payload["stack"], payload.get("max_results", MAX_RESULTS))
+    if op == "search_stacks":
+        return search_stacks(payload["query"], payload.get("stacks"), payload.get("max_results", MAX_RESULTS))
+    if op == "search_all":
+        return search_all(payload["query"], payload.get("domains"), payload.get("max_results", MAX_RESULTS))
+    if op == "semantic_search":
+        from semantic import HYBRID_ALPHA, semantic_search
+        return semantic_search(payload["query"], payload.get("domain"), payload.get("max_results", MAX_RESULTS),
+                               payload.get("alpha", HYBRID_ALPHA))
+    if op == "suggest":
+        return suggest(payload["prefix"], payload.get("domain"), payload.get("k", SUGGEST_RESULTS))
+    if op == "design_system":
+        if generator is None:
+            raise RuntimeError("Design system generation is unavailable in this daemon")
+        from design_system import format_ascii_box, format_markdown
+        design_system = generator.generate(payload["query"], payload.get("project_name"))
+        if payload.get("format") == "markdown":
+            return format_markdown(design_system)
+        return format_ascii_box(design_system)
+    raise ValueError(f"Unknown op: {op}")
+
+
+def _claim_socket(path):
+    """Remove a stale socket file; refuse to start if a daemon is already listening
+    or the path holds anything but our own socket"""
+    if not os.path.lexists(path):
+        return
+    if not _owned_socket(path):
+        raise SystemExit(f"Refusing to replace {path}: not a socket owned by this user")
+    if request({"op": "ping"}, path) is not None:
+        raise SystemExit(f"A daemon is already listening on {path}")
+    os.unlink(path)
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(path=None):
+    """Run the daemon in the foreground until SIGINT/SIGTERM"""
+    import signal
+    import socketserver
+
+    if not hasattr(socket, "AF_UNIX"):
+        raise SystemExit("Unix domain sockets are not available on this platform")
+    path = path or socket_path(create=True)
+    if not path:
+        raise SystemExit("No private socket directory: set XDG_RUNTIME_DIR or UIPRO_SOCKET")
+    _claim_socket(path)
+    generator = warm_up()
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    reply = {"ok": True, "result": handle(json.loads(line), generator)}
+                except Exception as e:  # Report to the client; the daemon keeps serving
+                    reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                self.wfile.write(json.dumps(reply, ensure_ascii=False).encode('utf-8') + b"\n")
+                self.wfile.flush()
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    old_umask = os.umask(0o177)  # Socket usable by the owner only
+    try:
+        server = Server(path, Handler)
+    finally:
+        os.umask(old_umask)
+
+    signal.signal(signal.SIGTERM, _interrupt)
+    print(f"UI Pro Max daemon listening on {path} (pid {os.getpid()})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
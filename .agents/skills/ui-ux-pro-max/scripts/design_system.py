@@ -5,14 +5,21 @@ Design System Generator - Aggregates search results and applies reasoning
 to generate comprehensive design system recommendations.
 
 Usage:
-    from design_system import generate_design_system
+    from design_system import generate_design_system, async_generate_design_system
     result = generate_design_system("SaaS dashboard", "My Project")
+    result = await async_generate_design_system("SaaS dashboard", "My Project")
+    results = generate_design_systems([("e-bike store", "Volt Bikes"), ("kids cycles", None)])
+
+    python design_system.py "<query>" [-p "Project Name"] [-f markdown]
+    python design_system.py --batch queries.txt -o out/ [-f markdown] [--workers 4]
+        (one query per line, optionally "<TAB>Project Name", or {"query", "project_name"?} JSON lines)
 """
 
 import csv
 import json
+import sys
 from pathlib import Path
-from core import search, DATA_DIR
+from core import search, DATA_DIR, PROFILER, REGISTRY, CSV_CONFIG, _shared, _warm
 
 
 # ============ CONFIGURATION ============
@@ -27,91 +34,145 @@ SEARCH_CONFIG = {
 }
 
 
+DEFAULT_REASONING = {
+    "pattern": "Hero + Features + CTA",
+    "style_priority": ["Minimalism", "Flat Design"],
+    "color_mood": "Professional",
+    "typography_mood": "Clean",
+    "key_effects": "Subtle hover transitions",
+    "anti_patterns": "",
+    "decision_rules": {},
+    "severity": "MEDIUM"
+}
+
+RESOLVED_CACHE_SIZE = 4096  # categories remembered per ReasoningRules
+
+
+def _parse_rule(rule: dict) -> dict:
+    """Reasoning for one rule row, with Decision_Rules and Style_Priority parsed."""
+    decision_rules = {}
+    try:
+        decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
+    except json.JSONDecodeError:
+        pass
+
+    return {
+        "pattern": rule.get("Recommended_Pattern", ""),
+        "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
+        "color_mood": rule.get("Color_Mood", ""),
+        "typography_mood": rule.get("Typography_Mood", ""),
+        "key_effects": rule.get("Key_Effects", ""),
+        "anti_patterns": rule.get("Anti_Patterns", ""),
+        "decision_rules": decision_rules,
+        "severity": rule.get("Severity", "MEDIUM")
+    }
+
+
+def _substrings(text: str, lengths) -> list:
+    """Every substring of text whose length is in lengths."""
+    return [text[i:i + n] for n in lengths for i in range(len(text) - n + 1)]
+
+
+class ReasoningRules:
+    """Reasoning rules compiled for lookup by product category.
+
+    The three matching passes (exact UI_Category, UI_Category and category
+    containing one another, a UI_Category word inside the category) become
+    dict lookups, and the first rule in file order still wins. A category
+    costs one probe per substring of itself, independent of the rule count,
+    and is remembered once resolved.
+    """
+
+    def __init__(self, rows: list):
+        self.rows = rows
+        self.parsed = [_parse_rule(row) for row in rows]
+        self._exact = {}       # lowered UI_Category -> first rule index
+        self._contained = {}   # substring of a lowered UI_Category -> first rule index
+        self._keywords = {}    # UI_Category word -> first rule index
+        for i, row in enumerate(rows):
+            ui_cat = row.get("UI_Category", "").lower()
+            self._exact.setdefault(ui_cat, i)
+            for sub in _substrings(ui_cat, range(len(ui_cat) + 1)):
+                self._contained.setdefault(sub, i)
+            for kw in ui_cat.replace("/", " ").replace("-", " ").split():
+                self._keywords.setdefault(kw, i)
+        self._exact_lengths = sorted({len(k) for k in self._exact})
+        self._keyword_lengths = sorted({len(k) for k in self._keywords})
+        self._resolved = {}    # lowered category -> rule index or None
+
+    def find(self, category: str):
+        """Index of the rule for a category, or None."""
+        category = category.lower()
+        if category in self._resolved:
+            return self._resolved[category]
+
+        found = self._exact.get(category)
+        if found is None:
+            hits = [self._exact[s] for s in _substrings(category, self._exact_lengths) if s in self._exact]
+            if category in self._contained:
+                hits.append(self._contained[category])
+            found = min(hits, default=None)
+        if found is None:
+            hits = [self._keywords[s] for s in _substrings(category, self._keyword_lengths) if s in self._keywords]
+            found = min(hits, default=None)
+
+        if len(self._resolved) < RESOLVED_CACHE_SIZE:
+            self._resolved[category] = found
+        return found
+
+
+def _read_reasoning(filepath: Path, digest: str) -> ReasoningRules:
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return ReasoningRules(list(csv.DictReader(f)))
+
+
 # ============ DESIGN SYSTEM GENERATOR ============
 class DesignSystemGenerator:
     """Generates design system recommendations from aggregated searches."""
 
-    def __init__(self):
-        self.reasoning_data = self._load_reasoning()
+    @property
+    def reasoning_data(self) -> list:
+        """Reasoning rules, loaded once per process and reloaded when the CSV changes."""
+        return self._load_reasoning().rows
 
-    def _load_reasoning(self) -> list:
-        """Load reasoning rules from CSV."""
+    def _load_reasoning(self) -> ReasoningRules:
+        """Load reasoning rules from CSV (shared through the index registry)."""
         filepath = DATA_DIR / REASONING_FILE
         if not filepath.exists():
-            return []
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return list(csv.DictReader(f))
+            return ReasoningRules([])
+        return REGISTRY.derived(filepath, "reasoning", _read_reasoning)
 
-    def _multi_domain_search(self, query: str, style_priority: list = None) -> dict:
-        """Execute searches across multiple domains."""
-        results = {}
+    def _multi_domain_search(self, query: str, style_priority: list = None, done: dict = None) -> dict:
+        """Execute searches across multiple domains, skipping those already in `done`."""
+        results = dict(done or {})
         for domain, config in SEARCH_CONFIG.items():
+            if domain in results:
+                continue
             if domain == "style" and style_priority:
                 # For style, also search with priority keywords
                 priority_query = " ".join(style_priority[:2]) if style_priority else query
                 combined_query = f"{query} {priority_query}"
-                results[domain] = search(combined_query, domain, config["max_results"])
+                with PROFILER.stage(f"design_system.{domain}"):
+                    results[domain] = search(combined_query, domain, config["max_results"])
             else:
-                results[domain] = search(query, domain, config["max_results"])
+                with PROFILER.stage(f"design_system.{domain}"):
+                    results[domain] = search(query, domain, config["max_results"])
         return results
 
     def _find_reasoning_rule(self, category: str) -> dict:
         """Find matching reasoning rule for a category."""
-        category_lower = category.lower()
-
-        # Try exact match first
-        for rule in self.reasoning_data:
-            if rule.get("UI_Category", "").lower() == category_lower:
-                return rule
-
-        # Try partial match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            if ui_cat in category_lower or category_lower in ui_cat:
-                return rule
-
-        # Try keyword match
-        for rule in self.reasoning_data:
-            ui_cat = rule.get("UI_Category", "").lower()
-            keywords = ui_cat.replace("/", " ").replace("-", " ").split()
-            if any(kw in category_lower for kw in keywords):
-                return rule
-
-        return {}
+        rules = self._load_reasoning()
+        found = rules.find(category)
+        return rules.rows[found] if found is not None else {}
 
     def _apply_reasoning(self, category: str, search_results: dict) -> dict:
         """Apply reasoning rules to search results."""
-        rule = self._find_reasoning_rule(category)
-
-        if not rule:
-            return {
-                "pattern": "Hero + Features + CTA",
-                "style_priority": ["Minimalism", "Flat Design"],
-                "color_mood": "Professional",
-                "typography_mood": "Clean",
-                "key_effects": "Subtle hover transitions",
-                "anti_patterns": "",
-                "decision_rules": {},
-                "severity": "MEDIUM"
-            }
-
-        # Parse decision rules JSON
-        decision_rules = {}
-        try:
-            decision_rules = json.loads(rule.get("Decision_Rules", "{}"))
-        except json.JSONDecodeError:
-            pass
-
-        return {
-            "pattern": rule.get("Recommended_Pattern", ""),
-            "style_priority": [s.strip() for s in rule.get("Style_Priority", "").split("+")],
-            "color_mood": rule.get("Color_Mood", ""),
-            "typography_mood": rule.get("Typography_Mood", ""),
-            "key_effects": rule.get("Key_Effects", ""),
-            "anti_patterns": rule.get("Anti_Patterns", ""),
-            "decision_rules": decision_rules,
-            "severity": rule.get("Severity", "MEDIUM")
-        }
+        rules = self._load_reasoning()
+        found = rules.find(category)
+        reasoning = rules.parsed[found] if found is not None else DEFAULT_REASONING
+        # Callers get their own lists and dicts; the parsed rules are shared
+        return dict(reasoning, style_priority=list(reasoning["style_priority"]),
+                    decision_rules=dict(reasoning["decision_rules"]))
 
     def _select_best_match(self, results: list, priority_keywords: list) -> dict:
         """Select best matching result based on priority keywords."""
@@ -157,19 +218,20 @@ class DesignSystemGenerator:
     def generate(self, query: str, project_name: str = None) -> dict:
         """Generate complete design system recommendation."""
         # Step 1: First search product to get category
-        product_result = search(query, "product", 1)
+        with PROFILER.stage("design_system.product"):
+            product_result = search(query, "product", 1)
         product_results = product_result.get("results", [])
         category = "General"
         if product_results:
             category = product_results[0].get("Product Type", "General")
 
         # Step 2: Get reasoning rules for this category
-        reasoning = self._apply_reasoning(category, {})
+        with PROFILER.stage("design_system.reasoning"):
+            reasoning = self._apply_reasoning(category, {})
         style_priority = reasoning.get("style_priority", [])
 
-        # Step 3: Multi-domain search with style priority hints
-        search_results = self._multi_domain_search(query, style_priority)
-        search_results["product"] = product_result  # Reuse product search
+        # Step 3: Multi-domain search with style priority hints (product already searched)
+        search_results = self._multi_domain_search(query, style_priority, {"product": product_result})
 
         # Step 4: Select best matches from each domain using priority
         style_results = self._extract_results(search_results.get("style", {}))
@@ -467,9 +529,96 @@ def generate_design_system(query: str, project_name: str = None, output_format:
     generator = DesignSystemGenerator()
     design_system = generator.generate(query, project_name)
 
-    if output_format == "markdown":
-        return format_markdown(design_system)
-    return format_ascii_box(design_system)
+    with PROFILER.stage("format"):
+        if output_format == "markdown":
+            return format_markdown(design_system)
+        return format_ascii_box(design_system)
+
+
+async def async_generate_design_system(query: str, project_name: str = None, output_format: str = "ascii") -> str:
+    """
+    generate_design_system() for asyncio services.
+
+    The searched domains' indexes and the reasoning rules are loaded on the
+    default executor and awaited once per process; identical concurrent
+    requests share one generation.
+    """
+    import asyncio
+
+    loads = [_warm(DATA_DIR / REASONING_FILE, DesignSystemGenerator()._load_reasoning)]
+    for domain in SEARCH_CONFIG:
+        config = CSV_CONFIG[domain]
+        filepath = DATA_DIR / config["file"]
+        loads.append(_warm(filepath, REGISTRY.index, filepath, config["search_cols"], config["output_cols"]))
+    await asyncio.gather(*loads)
+    return await _shared(("design_system", query, project_name, output_format),
+                         generate_design_system, query, project_name, output_format)
+
+
+def _load_generator_data() -> None:
+    """Map the searched domains' indexes and load the reasoning rules into this process."""
+    DesignSystemGenerator().reasoning_data
+    for domain in SEARCH_CONFIG:
+        config = CSV_CONFIG[domain]
+        filepath = DATA_DIR / config["file"]
+        if filepath.exists():
+            REGISTRY.index(filepath, config["search_cols"], config["output_cols"])
+
+
+def _generate_one(job: tuple) -> str:
+    query, project_name, output_format = job
+    return generate_design_system(query, project_name, output_format)
+
+
+def generate_design_systems(queries, output_format: str = "ascii", workers: int = None) -> list:
+    """
+    Generate many design systems over a process pool.
+
+    Args:
+        queries: Iterable of query strings or (query, project_name) pairs
+        output_format: "ascii" (default) or "markdown"
+        workers: Pool size (default: CPU count); 1 generates in-process
+
+    Returns:
+        Formatted design system strings, in input order
+
+    The parent writes every index segment before the pool starts, so workers
+    map the same files (inherited directly when processes fork) instead of
+    each fitting its own copy.
+    """
+    import os
+
+    jobs = [(q, None, output_format) if isinstance(q, str) else (q[0], q[1], output_format) for q in queries]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    _load_generator_data()
+    if workers <= 1:
+        return [_generate_one(job) for job in jobs]
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_generator_data) as pool:
+        return list(pool.map(_generate_one, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+
+def _read_queries(path: str) -> list:
+    """(query, project_name) per non-empty line: "query[<TAB>project name]" or JSON"""
+    queries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("{"):
+                request = json.loads(line)
+                queries.append((request["query"], request.get("project_name")))
+            elif line:
+                query, _, project_name = line.partition("\t")
+                queries.append((query.strip(), project_name.strip() or None))
+    return queries
+
+
+def _output_name(index: int, query: str, project_name: str, output_format: str) -> str:
+    """Numbered, filesystem-safe file name for one batch result"""
+    slug = "".join(ch if ch.isalnum() else "-" for ch in (project_name or query).lower())
+    slug = "-".join(part for part in slug.split("-") if part)[:60] or "design-system"
+    return f"{index:03d}-{slug}.{'md' if output_format == 'markdown' else 'txt'}"
 
 
 # ============ CLI SUPPORT ============
@@ -477,11 +626,33 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Generate Design System")
-    parser.add_argument("query", help="Search query (e.g., 'SaaS dashboard')")
+    parser.add_argument("query", nargs="?", help="Search query (e.g., 'SaaS dashboard')")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name")
     parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format")
+    parser.add_argument("--batch", "-b", metavar="FILE", help="Generate one design system per line of FILE")
+    parser.add_argument("--output-dir", "-o", default="design-systems", help="Directory for --batch results (default: design-systems)")
+    parser.add_argument("--workers", "-w", type=int, default=None, help="Processes for --batch (default: CPU count)")
 
     args = parser.parse_args()
 
-    result = generate_design_system(args.query, args.project_name, args.format)
-    print(result)
+    if args.batch:
+        import os
+        import time
+
+        queries = _read_queries(args.batch)
+        start = time.perf_counter()
+        results = generate_design_systems(queries, args.format, args.workers)
+        os.makedirs(args.output_dir, exist_ok=True)
+        for i, ((query, project_name), result) in enumerate(zip(queries, results), 1):
+            with open(os.path.join(args.output_dir, _output_name(i, query, project_name, args.format)), 'w', encoding='utf-8') as f:
+                f.write(result + "\n")
+        elapsed = time.perf_counter() - start
+        rate = len(results) / elapsed if elapsed > 0 else 0.0
+        workers = min(args.workers or os.cpu_count() or 1, len(queries))
+        print(f"{len(results)} design systems in {elapsed:.3f}s ({rate:.1f}/sec, {workers} workers) -> {args.output_dir}",
+              file=sys.stderr)
+    elif args.query is None:
+        parser.error("the following arguments are required: query (or --batch FILE)")
+    else:
+        result = generate_design_system(args.query, args.project_name, args.format)
+        print(result)
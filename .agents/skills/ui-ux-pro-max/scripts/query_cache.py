@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Query Cache - SQLite result cache shared by all search.py processes
+
+Usage:
+    from core import enable_query_cache
+    enable_query_cache()          # or set UIPRO_QUERY_CACHE=1 / pass --cache to search.py
+"""
+
+import json
+import sqlite3
+import time
+
+
+# ============ CONFIGURATION ============
+DEFAULT_TTL = 7 * 24 * 3600   # seconds
+DEFAULT_MAX_ENTRIES = 10000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key      TEXT PRIMARY KEY,
+    version  TEXT NOT NULL,
+    value    TEXT NOT NULL,
+    created  REAL NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+
+
+# ============ QUERY CACHE ============
+class QueryCache:
+    """Persistent result cache with TTL and LRU size eviction.
+
+    Entries carry the digest of the data file they were computed from; a
+    lookup under a different digest is a miss. Every SQLite error (locked,
+    read-only, corrupt) degrades to a miss so search never fails because of
+    the cache.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=1.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _key(key):
+        return json.dumps(key, ensure_ascii=False, separators=(',', ':'))
+
+    def get(self, key, version):
+        """Cached value for key if fresh and computed from `version`, else None"""
+        try:
+            conn = self._connect()
+            row = conn.execute("SELECT version, value, created FROM results WHERE key = ?",
+                               (self._key(key),)).fetchone()
+            if row is None or row[0] != version or time.time() - row[2] > self.ttl:
+                return None
+            conn.execute("UPDATE results SET accessed = ? WHERE key = ?", (time.time(), self._key(key)))
+            return json.loads(row[1])
+        except (sqlite3.Error, OSError, ValueError):
+            return None
+
+    def put(self, key, version, value):
+        try:
+            conn = self._connect()
+            now = time.time()
+            conn.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                         (self._key(key), version, json.dumps(value, ensure_ascii=False), now, now))
+            self._evict(conn, now)
+        except (sqlite3.Error, OSError):
+            pass
+
+    def _evict(self, conn, now):
+        """Drop expired entries, then least recently used ones beyond max_entries"""
+        conn.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+        excess = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute("DELETE FROM results WHERE key IN "
+                         "(SELECT key FROM results ORDER BY accessed LIMIT ?)", (excess,))
+
+    def clear(self):
+        try:
+            self._connect().execute("DELETE FROM results")
+        except (sqlite3.Error, OSError):
+            pass
+
+    def stats(self):
+        try:
+            count = self._connect().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        except (sqlite3.Error, OSError):
+            count = 0
+        return {"path": str(self.path), "entries": count, "ttl": self.ttl, "max_entries": self.max_entries}
@@ -3,15 +3,28 @@
 """
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
 Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+       python search.py "<query>" --stack all    (or --stack react,nextjs: several stacks concurrently, per-stack report)
+       python search.py "<query>" --domain all    (global top results across every domain and stack)
        python search.py "<query>" --design-system [-p "Project Name"]
+       python search.py "<query>" --compact json|msgpack [--columnar]    (minified JSON or MessagePack for programs)
+       python search.py "<prefix>" --suggest [--domain style] [-n 8]    (typeahead over style, color, font, icon, product and pattern names)
+       python search.py "<query>" --semantic [--alpha 0.5]    (BM25 fused with offline LSA embeddings; needs NumPy)
+       python search.py --build-index [--semantic]
+       python search.py --serve    (warm daemon; later calls are forwarded to it)
+       python search.py --batch < queries.jsonl    ({"query", "domain"?, "stack"?, "max_results"?} per line)
+       python search.py "<query>" --profile [--json] [--profile-dump out.pstats]    (per-stage wall times)
 
 Domains: style, prompt, color, chart, landing, product, ux, typography
 Stacks: html-tailwind, react, nextjs
 """
 
 import argparse
-from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, search, search_stack
-from design_system import generate_design_system
+import sys
+from core import CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, SCORING_BACKENDS
+
+# Everything else is imported by the mode that needs it: this script is started
+# once per agent query, so its startup time is paid on every call
+# (see `python bench.py startup`).
 
 
 def format_output(result):
@@ -20,6 +33,36 @@ def format_output(result):
         return f"Error: {result['error']}"
 
     output = []
+    if "suggestions" in result:
+        output.append("## UI Pro Max Suggestions")
+        output.append(f"**Domain:** {result['domain']} | **Prefix:** {result['prefix']}\n")
+        for hit in result['suggestions']:
+            output.append(f"- {hit['name']} ({', '.join(hit['domains'])})")
+        return "\n".join(output)
+
+    if result.get("domain") == "stacks":
+        output.append("## UI Pro Max Stack Guidelines")
+        output.append(f"**Stacks:** {', '.join(result['stacks'])} | **Query:** {result['query']}")
+        output.append(f"**Found:** {result['count']} results in {result['latency_ms']:.1f} ms\n")
+        for report in result['results']:
+            output.append(format_output(report).replace("## UI Pro Max Stack Guidelines\n", "", 1))
+            output.append(f"_{report['latency_ms']:.1f} ms_\n")
+        return "\n".join(output)
+
+    if result.get("domain") == "all":
+        output.append("## UI Pro Max Search Results")
+        output.append(f"**Domain:** all | **Query:** {result['query']}")
+        output.append(f"**Found:** {result['count']} results\n")
+        for i, hit in enumerate(result['results'], 1):
+            output.append(f"### Result {i} ({hit['domain']}, {hit['file']})")
+            for key, value in hit['row'].items():
+                value_str = str(value)
+                if len(value_str) > 300:
+                    value_str = value_str[:300] + "..."
+                output.append(f"- **{key}:** {value_str}")
+            output.append("")
+        return "\n".join(output)
+
     if result.get("stack"):
         output.append(f"## UI Pro Max Stack Guidelines")
         output.append(f"**Stack:** {result['stack']} | **Query:** {result['query']}")
@@ -40,37 +83,248 @@ def format_output(result):
     return "\n".join(output)
 
 
-if __name__ == "__main__":
+def run_batch(lines, out=sys.stdout):
+    """Answer one JSON query per input line, writing one JSON result line per query.
+
+    Indexes are loaded once per domain/stack and reused for the whole batch.
+    Returns (queries answered, elapsed seconds).
+    """
+    import json
+    import time
+    from core import search, search_stack
+
+    count = 0
+    start = time.perf_counter()
+    for line_no, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+            max_results = request.get("max_results", MAX_RESULTS)
+            if request.get("stack"):
+                result = search_stack(request["query"], request["stack"], max_results)
+            else:
+                result = search(request["query"], request.get("domain"), max_results)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            result = {"error": f"line {line_no}: {type(e).__name__}: {e}"}
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+        count += 1
+    return count, time.perf_counter() - start
+
+
+def _forward(args, payload):
+    """Result from a running daemon, or None to search in-process"""
+    if args.no_daemon or args.profile:
+        return None
+    from daemon import request
+    return request(payload)
+
+
+def _print_result(args, result):
+    if args.compact:
+        from compact import encode
+        from core import PROFILER
+        with PROFILER.stage("format"):
+            data = encode(result, args.compact, args.columnar)
+        if args.profile:
+            data = encode(dict(result, profile=PROFILER.report()), args.compact, args.columnar)
+        sys.stdout.flush()
+        sys.stdout.buffer.write(data + b"\n" if args.compact == "json" else data)
+        sys.stdout.buffer.flush()
+    elif args.json:
+        import json
+        if args.profile:
+            from core import PROFILER
+            with PROFILER.stage("format"):
+                json.dumps(result, indent=2, ensure_ascii=False)
+            result = dict(result, profile=PROFILER.report())
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    else:
+        from core import PROFILER
+        with PROFILER.stage("format"):
+            text = format_output(result)
+        print(text)
+
+
+def format_profile(report):
+    """Stage timings as an aligned table (stages may nest, so they need not sum to the total)"""
+    lines = ["## Profile (wall ms)", f"{'total':<24} {report['total_ms']:>10.3f}"]
+    for name, timing in sorted(report["stages"].items(), key=lambda item: -item[1]["ms"]):
+        calls = timing["calls"]
+        lines.append(f"{name:<24} {timing['ms']:>10.3f}  ({calls} call{'s' if calls != 1 else ''})")
+    return "\n".join(lines)
+
+
+def _stacks(value):
+    """--stack value as a list of stack names ("all" expands to every stack)"""
+    stacks = AVAILABLE_STACKS if value == "all" else [s.strip() for s in value.split(",") if s.strip()]
+    unknown = [s for s in stacks if s not in AVAILABLE_STACKS]
+    if unknown or not stacks:
+        raise argparse.ArgumentTypeError(f"invalid choice: {value!r} (choose from all, {', '.join(AVAILABLE_STACKS)})")
+    return stacks
+
+
+def main(argv=None):
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
-    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
-    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search (html-tailwind, react, nextjs)")
+    parser.add_argument("query", nargs="?", help="Search query")
+    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()) + ["all"], help="Search domain (all: every domain and stack at once)")
+    parser.add_argument("--stack", "-s", type=_stacks, help="Stack-specific search (html-tailwind, react, nextjs); \"all\" or a comma-separated list searches several stacks concurrently")
     parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--compact", choices=["json", "msgpack"], help="Compact machine output: minified JSON or MessagePack (binary)")
+    parser.add_argument("--columnar", action="store_true", help="List column names once and rows as arrays (implies --compact json unless given)")
+    parser.add_argument("--cache", action="store_true", help="Use the persistent query cache shared across runs (also: UIPRO_QUERY_CACHE=1)")
+    parser.add_argument("--backend", choices=SCORING_BACKENDS, help="Scoring backend (default: python; numpy needs NumPy; also: UIPRO_BACKEND)")
+    parser.add_argument("--semantic", action="store_true", help="Hybrid BM25 + LSA search for paraphrased queries (needs NumPy); with --build-index, also build the LSA model")
+    parser.add_argument("--alpha", type=float, default=None, help="BM25 share of the --semantic score, 0 (LSA only) to 1 (BM25 only); default 0.5")
+    parser.add_argument("--suggest", action="store_true", help="Complete the query as a name prefix (styles, colors, fonts, icons, products, patterns)")
     # Design system generation
     parser.add_argument("--design-system", "-ds", action="store_true", help="Generate complete design system recommendation")
     parser.add_argument("--project-name", "-p", type=str, default=None, help="Project name for design system output")
     parser.add_argument("--format", "-f", choices=["ascii", "markdown"], default="ascii", help="Output format for design system")
+    # Index maintenance and daemon
+    parser.add_argument("--build-index", action="store_true", help="Prebuild the on-disk index for every domain and stack")
+    parser.add_argument("--serve", action="store_true", help="Run a daemon that keeps all indexes warm (Unix socket)")
+    parser.add_argument("--no-daemon", action="store_true", help="Search in-process even if a daemon is running")
+    parser.add_argument("--batch", action="store_true", help="Read JSON-lines queries from stdin, stream JSON-lines results")
+    # Instrumentation
+    parser.add_argument("--profile", action="store_true", help="Report wall time per stage (stderr, or a \"profile\" key with --json); runs in-process")
+    parser.add_argument("--profile-dump", metavar="PATH", help="Also write a cProfile/pstats dump to PATH (implies --profile)")
+
+    args = parser.parse_args(argv)
+    if args.profile_dump:
+        args.profile = True
+    if args.columnar and not args.compact:
+        args.compact = "json"
+
+    if args.cache:
+        from core import enable_query_cache
+        enable_query_cache()
+    if args.backend:
+        from core import set_backend
+        try:
+            set_backend(args.backend)
+        except ImportError as e:
+            parser.error(str(e))
 
-    args = parser.parse_args()
+    if not args.profile:
+        _run(args, parser)
+        return
 
+    from core import PROFILER
+    profiler = None
+    if args.profile_dump:
+        import cProfile
+        profiler = cProfile.Profile()
+    PROFILER.start()
+    try:
+        if profiler:
+            profiler.runcall(_run, args, parser)
+        else:
+            _run(args, parser)
+    finally:
+        PROFILER.stop()
+        if profiler:
+            profiler.dump_stats(args.profile_dump)
+    # With --json (or --compact, for searches) the report is already part of the output
+    embedded = args.json or (args.compact and not args.design_system)
+    if not embedded or args.build_index or args.serve or args.batch:
+        print(format_profile(PROFILER.report()), file=sys.stderr)
+    if profiler:
+        print(f"pstats written to {args.profile_dump}", file=sys.stderr)
+
+
+def _run(args, parser):
+    if args.build_index:
+        from core import build_indexes
+        built = build_indexes()
+        print(f"Indexed {len(built)} files")
+        if args.semantic:
+            from semantic import build_semantic_index
+            try:
+                print(f"Semantic model: {build_semantic_index()}")
+            except ImportError as e:
+                parser.error(str(e))
+    elif args.serve:
+        from daemon import serve
+        serve()
+    elif args.batch:
+        count, elapsed = run_batch(sys.stdin)
+        rate = count / elapsed if elapsed > 0 else 0.0
+        print(f"{count} queries in {elapsed:.3f}s ({rate:.1f} queries/sec)", file=sys.stderr)
+    elif args.query is None:
+        parser.error("the following arguments are required: query")
     # Design system takes priority
-    if args.design_system:
-        result = generate_design_system(args.query, args.project_name, args.format)
+    elif args.design_system:
+        result = _forward(args, {"op": "design_system", "query": args.query,
+                                 "project_name": args.project_name, "format": args.format})
+        if result is None:
+            from design_system import generate_design_system
+            result = generate_design_system(args.query, args.project_name, args.format)
+        if args.json and args.profile:
+            import json
+            from core import PROFILER
+            result = {"query": args.query, "format": args.format, "output": result, "profile": PROFILER.report()}
+            result = json.dumps(result, indent=2, ensure_ascii=False)
         print(result)
+    # Hybrid BM25 + LSA
+    elif args.semantic:
+        if args.domain == "all" or (args.stack and len(args.stack) > 1):
+            parser.error("--semantic searches one domain or one stack")
+        domain = f"stack:{args.stack[0]}" if args.stack else args.domain
+        payload = {"op": "semantic_search", "query": args.query, "domain": domain, "max_results": args.max_results}
+        if args.alpha is not None:
+            payload["alpha"] = args.alpha
+        result = _forward(args, payload)
+        if result is None:
+            from semantic import HYBRID_ALPHA, semantic_search
+            try:
+                result = semantic_search(args.query, domain, args.max_results,
+                                         HYBRID_ALPHA if args.alpha is None else args.alpha)
+            except ImportError as e:
+                parser.error(str(e))
+        _print_result(args, result)
+    # Typeahead
+    elif args.suggest:
+        domain = None if args.domain == "all" else args.domain
+        result = _forward(args, {"op": "suggest", "prefix": args.query, "domain": domain, "k": args.max_results})
+        if result is None:
+            from core import suggest
+            result = suggest(args.query, domain, args.max_results)
+        _print_result(args, result)
+    # Several stacks at once
+    elif args.stack and len(args.stack) > 1:
+        result = _forward(args, {"op": "search_stacks", "query": args.query,
+                                 "stacks": args.stack, "max_results": args.max_results})
+        if result is None:
+            from core import search_stacks
+            result = search_stacks(args.query, args.stack, args.max_results)
+        _print_result(args, result)
     # Stack search
     elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
+        result = _forward(args, {"op": "search_stack", "query": args.query,
+                                 "stack": args.stack[0], "max_results": args.max_results})
+        if result is None:
+            from core import search_stack
+            result = search_stack(args.query, args.stack[0], args.max_results)
+        _print_result(args, result)
+    # Every domain and stack in one pass
+    elif args.domain == "all":
+        result = _forward(args, {"op": "search_all", "query": args.query, "max_results": args.max_results})
+        if result is None:
+            from core import search_all
+            result = search_all(args.query, max_results=args.max_results)
+        _print_result(args, result)
     # Domain search
     else:
-        result = search(args.query, args.domain, args.max_results)
-        if args.json:
-            import json
-            print(json.dumps(result, indent=2, ensure_ascii=False))
-        else:
-            print(format_output(result))
+        result = _forward(args, {"op": "search", "query": args.query,
+                                 "domain": args.domain, "max_results": args.max_results})
+        if result is None:
+            from core import search
+            result = search(args.query, args.domain, args.max_results)
+        _print_result(args, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Semantic Search - offline LSA embeddings with an IVF index, fused with BM25
+
+Usage:
+    python search.py --build-index --semantic           # build the model next to the indexes (needs NumPy)
+    python search.py "bike shop landing" --semantic     # hybrid BM25 + LSA search
+    from semantic import semantic_search
+    result = semantic_search("bike shop landing", "product")
+
+Everything is local: TF-IDF weights come from the unified index's postings,
+a truncated SVD (NumPy) projects them to LSA_DIM dimensions, and the model
+is stored in INDEX_DIR as semantic.npz, rebuilt when any data CSV changes.
+"""
+
+import json
+import os
+import threading
+from collections import Counter
+from heapq import nsmallest
+from math import log
+
+import core
+from core import MAX_RESULTS, REGISTRY, _numpy, _sources, detect_domain
+
+
+# ============ CONFIGURATION ============
+SEMANTIC_VERSION = 1
+LSA_DIM = 96             # embedding dimensions (capped by the corpus)
+LSA_OVERSAMPLE = 10      # extra random directions for the range finder
+LSA_POWER_ITERS = 4
+IVF_ITERS = 20           # k-means rounds for the inverted file
+IVF_PROBES = 12          # clusters scanned per query, at least
+EXACT_LIMIT = 2048       # ranges this small are scanned exhaustively (faster than probing)
+CANDIDATES = 50          # per side (BM25, LSA) before fusion
+HYBRID_ALPHA = 0.5       # BM25 share of the fused score; 1 - alpha goes to LSA
+SEED = 0
+
+
+# ============ TF-IDF MATRIX ============
+class _TermMatrix:
+    """L2-normalized documents x terms tf-idf matrix from an index's postings.
+
+    Stored term-major like the postings themselves, with a document-major
+    permutation for the other product; both products are a gather and one
+    add.reduceat, so no SciPy is needed.
+    """
+
+    def __init__(self, np, bm25):
+        self.np = np
+        starts, idf, doc_ids, tfs = bm25.export_postings()
+        self.indptr = np.asarray(starts, dtype=np.int64)
+        self.indices = np.asarray(doc_ids, dtype=np.int64)
+        self.terms = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int64), np.diff(self.indptr))
+        self.shape = (bm25.N, len(self.indptr) - 1)
+
+        weights = (1 + np.log(np.asarray(tfs, dtype=np.float64))) * np.asarray(idf, dtype=np.float64)[self.terms]
+        norms = np.sqrt(np.bincount(self.indices, weights=weights * weights, minlength=self.shape[0]))
+        self.data = weights / np.where(norms > 0, norms, 1)[self.indices]
+
+        self.by_doc = np.argsort(self.indices, kind="stable")
+        self.doc_indptr = np.concatenate(([0], np.cumsum(np.bincount(self.indices, minlength=self.shape[0]))))
+
+    def _reduce(self, values, indptr, rows):
+        """Sum consecutive runs of values delimited by indptr, skipping empty runs"""
+        np = self.np
+        out = np.zeros((rows, values.shape[1]))
+        nonempty = indptr[:-1] < indptr[1:]
+        if values.shape[0]:
+            out[nonempty] = np.add.reduceat(values, indptr[:-1][nonempty], axis=0)
+        return out
+
+    def dot(self, m):
+        """A @ m (documents x columns of m)"""
+        order = self.by_doc
+        return self._reduce(self.data[order, None] * m[self.terms[order]], self.doc_indptr, self.shape[0])
+
+    def tdot(self, m):
+        """A.T @ m (terms x columns of m)"""
+        return self._reduce(self.data[:, None] * m[self.indices], self.indptr, self.shape[1])
+
+
+def _truncated_svd(np, matrix, k):
+    """Top-k right singular vectors (terms x k) by randomized range finding with power iterations"""
+    rng = np.random.default_rng(SEED)
+    width = min(k + LSA_OVERSAMPLE, *matrix.shape)
+    q, _ = np.linalg.qr(matrix.dot(rng.standard_normal((matrix.shape[1], width))))
+    for _ in range(LSA_POWER_ITERS):
+        z, _ = np.linalg.qr(matrix.tdot(q))
+        q, _ = np.linalg.qr(matrix.dot(z))
+    _, _, vt = np.linalg.svd(matrix.tdot(q).T, full_matrices=False)
+    return vt[:k].T
+
+
+def _normalize(np, x):
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.where(norms > 0, norms, 1)
+
+
+def _kmeans(np, x, clusters):
+    """Spherical k-means: (unit centroids, cluster of each row)"""
+    rng = np.random.default_rng(SEED)
+    centroids = x[rng.choice(len(x), clusters, replace=False)]
+    for _ in range(IVF_ITERS):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        filled = np.linalg.norm(sums, axis=1) > 0
+        centroids[filled] = _normalize(np, sums[filled])   # Empty clusters keep their centroid
+    return centroids, np.argmax(x @ centroids.T, axis=1)
+
+
+# ============ SEMANTIC INDEX ============
+class SemanticIndex:
+    """LSA embeddings of every unified-index document, searched through an inverted file.
+
+    projection maps the unified vocabulary to LSA space; embeddings are the
+    unit-length document vectors. The IVF layout clusters them: a query
+    scans only the documents of its IVF_PROBES nearest clusters that hold
+    documents of the requested source (more until k of them turn up).
+    Ranges of at most EXACT_LIMIT documents are scanned in full instead.
+    """
+
+    ARRAYS = ("projection", "embeddings", "centroids", "list_starts", "list_ids")
+
+    def __init__(self, key, projection, embeddings, centroids, list_starts, list_ids):
+        self.np = _numpy()
+        self.key = key
+        self.projection = projection
+        self.embeddings = embeddings
+        self.centroids = centroids
+        self.list_starts = list_starts
+        self.list_ids = list_ids
+
+    @classmethod
+    def build(cls, bm25, key, dim=LSA_DIM):
+        """Fit on an index's postings (the unified index: every domain and stack)"""
+        np = _numpy()
+        if np is None:
+            raise ImportError("Semantic search requires NumPy: pip install numpy")
+        with core.PROFILER.stage("semantic_fit"):
+            matrix = _TermMatrix(np, bm25)
+            dim = max(1, min(dim, min(matrix.shape) - 1))
+            projection = _truncated_svd(np, matrix, dim)
+            embeddings = _normalize(np, matrix.dot(projection))
+            centroids, assign = _kmeans(np, embeddings, max(1, min(len(embeddings), int(len(embeddings) ** 0.5))))
+            list_ids = np.argsort(assign, kind="stable")
+            list_starts = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=len(centroids)))))
+        return cls(key, projection.astype(np.float32), embeddings.astype(np.float32),
+                   centroids.astype(np.float32), list_starts.astype(np.int64), list_ids.astype(np.int64))
+
+    def save(self, path):
+        """Write atomically, like the index segments"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with open(tmp, 'wb') as f:
+            self.np.savez(f, key=self.np.array(json.dumps(self.key)),
+                          **{name: getattr(self, name) for name in self.ARRAYS})
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, key):
+        """Saved index if it was built for key, else None"""
+        np = _numpy()
+        try:
+            with np.load(path) as saved:
+                if json.loads(str(saved["key"])) != key:
+                    return None
+                return cls(key, *(saved[name] for name in cls.ARRAYS))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def embed(self, bm25, query):
+        """Unit LSA vector of a query (tf-idf over bm25's vocabulary), or None without known terms"""
+        np = self.np
+        counts = Counter(bm25.query_vector(query))
+        if not counts:
+            return None
+        terms = np.fromiter(counts, dtype=np.int64, count=len(counts))
+        weights = np.array([(1 + log(tf)) * bm25._lookup(t)[0] for t, tf in counts.items()])
+        vector = weights @ self.projection[terms]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else None
+
+    def nearest(self, vector, k, lo=0, hi=None, exact=False):
+        """Top k (doc_id, cosine) among doc ids in [lo, hi)"""
+        np = self.np
+        hi = len(self.embeddings) if hi is None else hi
+        if exact or hi - lo <= EXACT_LIMIT:
+            ids = np.arange(lo, hi)
+        else:
+            # Only clusters holding documents of [lo, hi) count as probes, so
+            # a narrow source is searched as thoroughly as the whole corpus
+            parts, found, probed = [], 0, 0
+            for cluster in np.argsort(-(self.centroids @ vector)):
+                ids = self.list_ids[self.list_starts[cluster]:self.list_starts[cluster + 1]]
+                ids = ids[(ids >= lo) & (ids < hi)]
+                if len(ids):
+                    parts.append(ids)
+                    found += len(ids)
+                    probed += 1
+                    if probed >= IVF_PROBES and found >= k:
+                        break
+            ids = np.concatenate(parts) if parts else np.zeros(0, dtype=np.int64)
+        if not len(ids) or k <= 0:
+            return []
+        scores = self.embeddings[ids] @ vector
+        if len(ids) > k:
+            keep = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[keep], scores[keep]
+        order = np.lexsort((ids, -scores))
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+
+_CACHE = {}
+_LOCK = threading.Lock()
+
+
+def semantic_index(build=True):
+    """(SemanticIndex, UnifiedIndex): from memory, INDEX_DIR/semantic.npz, or a fresh fit"""
+    if _numpy() is None:
+        raise ImportError("Semantic search requires NumPy: pip install numpy")
+    unified = REGISTRY.unified()
+    key = [SEMANTIC_VERSION, unified.digest, LSA_DIM]
+    cached = _CACHE.get("index")
+    if cached and cached.key == key:
+        return cached, unified
+    with _LOCK:
+        cached = _CACHE.get("index")
+        if cached and cached.key == key:
+            return cached, unified
+        path = core.INDEX_DIR / "semantic.npz"
+        with core.PROFILER.stage("semantic_load"):
+            index = SemanticIndex.load(path, key)
+        if index is None:
+            if not build:
+                return None, unified
+            index = SemanticIndex.build(unified.bm25, key)
+            try:
+                index.save(path)
+            except OSError:
+                pass  # Read-only data dir: keep the in-memory model
+        _CACHE["index"] = index
+        return index, unified
+
+
+def build_semantic_index():
+    """Build (or validate) the on-disk model; returns its path"""
+    semantic_index()
+    return core.INDEX_DIR / "semantic.npz"
+
+
+# ============ HYBRID SEARCH ============
+def semantic_search(query, domain=None, max_results=MAX_RESULTS, alpha=HYBRID_ALPHA):
+    """BM25 fused with LSA similarity, for queries that paraphrase the data.
+
+    domain is a CSV_CONFIG domain or "stack:<name>" (auto-detected when
+    None). The fused score is alpha * bm25 / best bm25 + (1 - alpha) *
+    cosine over the union of both sides' top CANDIDATES, so alpha=1 ranks
+    exactly like search() and alpha=0 is pure LSA.
+    """
+    if domain is None:
+        with core.PROFILER.stage("detect_domain"):
+            domain = detect_domain(query)
+    sources = {name: (filepath, search_cols, output_cols) for name, filepath, search_cols, output_cols in _sources()}
+    if domain not in sources or not sources[domain][0].exists():
+        return {"error": f"Unknown domain: {domain}. Available: {', '.join(name for name, (fp, _, _) in sources.items() if fp.exists())}"}
+
+    index, unified = semantic_index()
+    source = unified.names.index(domain)
+    lo, hi = unified.starts[source], unified.starts[source + 1]
+    bm25, rows, _ = REGISTRY.index(*sources[domain])
+
+    depth = max(CANDIDATES, max_results)
+    with core.PROFILER.stage("score"):
+        lexical = bm25._accumulate(bm25.query_vector(query))
+        candidates = {row for row, _ in nsmallest(depth, lexical.items(), key=lambda x: (-x[1], x[0]))}
+        vector = index.embed(unified.bm25, query)
+        cosine = {}
+        if vector is not None:
+            cosine = {doc - lo: score for doc, score in index.nearest(vector, depth, lo, hi)}
+            candidates.update(cosine)
+            missing = [row for row in candidates if row not in cosine]
+            if missing:
+                scores = index.embeddings[[lo + row for row in missing]] @ vector
+                cosine.update(zip(missing, scores.tolist()))
+        best = max(lexical.values(), default=0.0)
+        fused = {row: alpha * (lexical.get(row, 0.0) / best if best > 0 else 0.0) + (1 - alpha) * max(cosine.get(row, 0.0), 0.0)
+                 for row in candidates}
+        ranked = nsmallest(max_results, ((row, score) for row, score in fused.items() if score > 0),
+                           key=lambda x: (-x[1], x[0]))
+
+    with core.PROFILER.stage("hydrate"):
+        results = [dict(rows[row]) for row, _ in ranked]
+
+    return {
+        "domain": domain,
+        "query": query,
+        "file": unified.files[source],
+        "mode": "hybrid",
+        "alpha": alpha,
+        "count": len(results),
+        "results": results
+    }